@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict
+
+
+# 生成的 srk 文件目录，记录每个 srk 文件的基础信息，便于列表页和同步工具直接读取
+CATALOG_PATH = 'catalog.json'
+CATALOG_VERSION = 1
+
+# 路径: 目录数据，同一进程内多次更新时无需重复读取
+_catalogs = {}
+
+
+def load(path: str = CATALOG_PATH) -> Dict[str, Any]:
+    if path in _catalogs:
+        return _catalogs[path]
+    catalog = {'version': CATALOG_VERSION, 'contests': {}}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # 能解析但结构或版本不符的文件（如手工编辑或旧版本的目录）与解析失败一样重新生成
+            if not isinstance(data, dict) or data.get('version') != CATALOG_VERSION \
+                    or not isinstance(data.get('contests'), dict):
+                raise ValueError('目录文件结构或版本不一致')
+            catalog = data
+        except Exception as e:
+            print(f'读取目录文件 {path} 失败，将重新生成', e)
+    _catalogs[path] = catalog
+    return catalog
+
+
+def save(catalog: Dict[str, Any], path: str = CATALOG_PATH) -> None:
+    # 先写临时文件再替换，避免读取到写了一半的目录文件
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def entry(rank: Dict[str, Any], content: bytes, source: str = None) -> Dict[str, Any]:
+    '''
+        rank: srk 结构
+        content: 写入文件的 srk 内容
+        source: 数据来源地址【可选】
+    '''
+    contest = rank['contest']
+    title = contest['title']
+    if isinstance(title, dict):
+        title = title.get('zh-CN') or title.get('fallback')
+    return {
+        'title': title,
+        'startAt': contest.get('startAt'),
+        'duration': contest.get('duration'),
+        'teams': len(rank.get('rows', [])),
+        'problems': len(rank.get('problems', [])),
+        'size': len(content),
+        'sha256': hashlib.sha256(content).hexdigest(),
+        'source': source,
+    }
+
+
+def update(name: str, rank: Dict[str, Any], content: bytes, source: str = None, path: str = CATALOG_PATH) -> None:
+    '''
+        写入 srk 文件后更新目录中对应的条目
+        name: srk 文件路径
+    '''
+    catalog = load(path)
+    catalog['contests'][name] = entry(rank, content, source)
+    save(catalog, path)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from multiprocessing import get_context
+from pathlib import Path
+from detect import ARTIFACT_LEVELS, detect_table_regions
+from convert import CHECKPOINT_FILENAME, CHECKPOINT_INTERVAL, LazyOCR, OCRPool
+from pipeline import run_pipeline, save_outputs
+from ocr_cache import OCRCache
+from ocr_server import DEFAULT_ADDRESS, connect_ocr_server
+from ocr_backends import BACKENDS
+
+# 目录模式下处理的图片后缀
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.bmp', '.npy')
+
+# 批量处理的汇总文件名
+SUMMARY_FILENAME = "summary.json"
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='批量转换多张榜单截图到 srk：多进程检测，所有榜单共用OCR模型，单张榜单失败不影响其他榜单',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('input', help='榜单截图目录，或 JSON 清单文件（["a.png", {"image": "b.png", "name": "b"}]）')
+    parser.add_argument('-o', '--output', required=True, help='输出目录，每张榜单保存为 <名称>.srk.json，汇总保存为 summary.json')
+    parser.add_argument('-j', '--jobs', type=int, default=min(4, os.cpu_count() or 1), help='检测进程数')
+    parser.add_argument('--strip-height', type=int, default=0, help='分块处理时每个条带的高度（像素），0 表示整图处理')
+    parser.add_argument('--debug', action='store_true', help='保存每张榜单的检测结果和识别结果到 <输出目录>/<名称>')
+    parser.add_argument('--artifacts', choices=ARTIFACT_LEVELS, default='optimized', help='调试输出时保存的图片级别')
+    parser.add_argument('-b', '--batch-size', type=int, default=16, help='批量识别时每批的单元格数量')
+    parser.add_argument('--cache', help='OCR结果缓存文件路径，默认保存到输出目录，重新运行时已识别的单元格直接复用')
+    parser.add_argument('--cache-tolerance', type=int, default=0, help='缓存按差值哈希模糊匹配时允许的汉明距离')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='共享识别进程数，所有榜单共用这些进程，每个进程只加载一次OCR模型')
+    parser.add_argument('--no-verdict', action='store_true', help='不按背景色判定状态单元格的结果')
+    parser.add_argument('--backend', choices=BACKENDS, default='paddle', help='OCR后端，同 convert.py')
+    parser.add_argument('--ocr-server', nargs='?', const=DEFAULT_ADDRESS,
+                        help='使用常驻OCR服务识别，可指定服务地址，不提供地址时使用 ocr_server.py 的默认地址；服务未运行时使用本地OCR后端')
+    parser.add_argument('--rows', action='store_true', help='整行识别表格主体，按表头的列范围分配文本')
+    parser.add_argument('--digits', action='store_true', help='数字列使用模板匹配识别，只有无法匹配的单元格使用OCR')
+    parser.add_argument('--penalty', type=int, default=20, help='每次错误提交的罚时（分钟），同 pipeline.py')
+    parser.add_argument('--force', action='store_true', help='重新处理已有 srk 输出的榜单，默认跳过')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        parser.error(f"输入路径 '{args.input}' 不存在")
+
+    return args
+
+
+def load_boards(input_path):
+    """
+    读取要处理的榜单列表
+    :param input_path: 截图目录或 JSON 清单文件，清单中的相对路径相对于清单所在目录
+    :return: [{"name", "image"}] 列表
+    """
+    input_path = Path(input_path)
+    if input_path.is_dir():
+        # 只保存文件名，与清单中的相对路径一样相对于 base_dir 拼接
+        entries = [path.name for path in sorted(input_path.iterdir()) if path.suffix.lower() in IMAGE_SUFFIXES]
+        base_dir = input_path
+    else:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError(f"清单文件 {input_path} 的根节点不是数组")
+        base_dir = input_path.parent
+
+    boards = []
+    names = set()
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"image": entry}
+        if not isinstance(entry, dict) or 'image' not in entry:
+            raise ValueError(f"清单中的条目缺少 image 字段: {entry}")
+        image = base_dir / entry['image']
+        name = entry.get('name') or image.stem
+        if name in names:
+            raise ValueError(f"榜单名称重复: {name}，请在清单中用 name 字段区分")
+        names.add(name)
+        boards.append({"name": name, "image": str(image)})
+    return boards
+
+
+def detect_board(task):
+    """
+    在检测进程中检测一张榜单，检测过程的输出只在失败时返回
+    :param task: (榜单序号, 图片路径, 条带高度)
+    :return: (榜单序号, 检测结果；失败时为 None, 耗时, 错误信息；成功时为 None)
+    """
+    index, image, strip_height = task
+    start_time = time.time()
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            regions = detect_table_regions(image, strip_height=strip_height)
+        return index, regions, time.time() - start_time, None
+    except Exception as e:
+        return index, None, time.time() - start_time, f"{type(e).__name__}: {e}"
+
+
+def process_boards(boards, output_dir, args, ocr, cache):
+    """
+    检测进程池按完成顺序交出检测结果，主进程依次识别和转换，检测与识别同时进行
+    :param boards: load_boards 返回的榜单列表
+    :param output_dir: 输出目录
+    :param args: 命令行参数
+    :param ocr: 所有榜单共用的OCR后端实例、OCRPool 实例或 OCRClient 实例
+    :param cache: 所有榜单共用的 OCRCache 实例
+    :return: 每张榜单的处理结果列表，顺序与 boards 一致
+    """
+    summary = [None] * len(boards)
+    pending = []
+    for index, board in enumerate(boards):
+        output_path = output_dir / f"{board['name']}.srk.json"
+        if output_path.exists() and not args.force:
+            summary[index] = {"name": board['name'], "image": board['image'], "status": "skipped",
+                              "output": str(output_path)}
+            print(f"跳过已处理的榜单: {board['name']}")
+        else:
+            pending.append((index, board['image'], args.strip_height or None))
+    if not pending:
+        return summary
+
+    jobs = max(1, min(args.jobs, len(pending)))
+    print(f"启动 {jobs} 个检测进程，处理 {len(pending)} 张榜单")
+    with get_context('spawn').Pool(jobs) as pool:
+        for done, (index, regions, detect_time, error) in enumerate(pool.imap_unordered(detect_board, pending), 1):
+            board = boards[index]
+            output_path = output_dir / f"{board['name']}.srk.json"
+            result = {"name": board['name'], "image": board['image'], "output": str(output_path),
+                      "detect_time": round(detect_time, 3)}
+            summary[index] = result
+            print(f"\n[{done}/{len(pending)}] {board['name']}")
+            if error is not None:
+                result.update(status="failed", error=f"检测失败: {error}")
+                print(f"检测失败: {error}")
+                continue
+
+            start_time = time.time()
+            try:
+                input_data, output_data, warnings, _ = run_pipeline(
+                    board['image'],
+                    ocr=ocr,
+                    debug_dir=output_dir / board['name'] if args.debug else None,
+                    artifacts=args.artifacts,
+                    batch_size=args.batch_size,
+                    cache=cache,
+                    classify=not args.no_verdict,
+                    digits=args.digits,
+                    rows=args.rows,
+                    regions=regions,
+                    penalty=args.penalty
+                )
+                valid = save_outputs(output_path, input_data, output_data, warnings)
+            except Exception as e:
+                result.update(status="failed", error=f"{type(e).__name__}: {e}")
+                print(f"处理失败: {e}")
+                continue
+            finally:
+                result["ocr_time"] = round(time.time() - start_time, 3)
+
+            result.update(status="ok" if valid else "invalid", rows=len(input_data['body']), warnings=len(warnings))
+            if not valid:
+                result["output"] = str(output_path.with_suffix('.result.json'))
+    return summary
+
+
+def print_summary(summary, elapsed_time):
+    """打印批量处理的汇总"""
+    print("\n" + "=" * 50)
+    print("批量处理汇总")
+    print("=" * 50)
+    for result in summary:
+        detail = result.get('error') or (f"{result['rows']} 行，{result['warnings']} 个校验问题"
+                                         if 'rows' in result else '')
+        print(f"{result['status']:8} {result['name']}  {detail}")
+    counts = {status: sum(1 for result in summary if result['status'] == status)
+              for status in ('ok', 'invalid', 'failed', 'skipped')}
+    print(f"通过 {counts['ok']} 张，校验失败 {counts['invalid']} 张，处理失败 {counts['failed']} 张，跳过 {counts['skipped']} 张")
+    print(f"总耗时: {elapsed_time:.3f}")
+    print("=" * 50)
+
+
+def main():
+    """主函数"""
+    start_time = time.time()
+    args = parse_args()
+
+    try:
+        boards = load_boards(args.input)
+    except (ValueError, json.JSONDecodeError) as e:
+        print(f"错误: {e}")
+        return 1
+    if not boards:
+        print(f"错误: {args.input} 中没有榜单截图")
+        return 1
+
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # 指定 --ocr-server 且服务正在运行时使用服务识别；否则所有榜单共用一个OCR后端或一组识别进程，模型只加载一次
+    ocr = connect_ocr_server(args.ocr_server, args.backend)
+    if ocr is None and args.ocr_server:
+        print(f"OCR服务 {args.ocr_server} 不可用，使用本地OCR后端: {args.backend}")
+    if ocr is not None:
+        print(f"使用OCR服务: {args.ocr_server}")
+    elif args.workers > 1:
+        ocr = OCRPool(args.backend, args.workers, args.batch_size if args.batch_size > 1 else None)
+    else:
+        ocr = LazyOCR(args.backend, args.batch_size if args.batch_size > 1 else None)
+    # 识别结果定期保存，中断后重新运行时已识别的单元格直接复用
+    cache = OCRCache(args.cache or output_dir / CHECKPOINT_FILENAME, args.cache_tolerance, CHECKPOINT_INTERVAL,
+                     args.backend)
+
+    try:
+        summary = process_boards(boards, output_dir, args, ocr, cache)
+    finally:
+        cache.save()
+        if isinstance(ocr, OCRPool):
+            ocr.close()
+
+    elapsed_time = time.time() - start_time
+    with open(output_dir / SUMMARY_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump({"boards": summary, "total_time": round(elapsed_time, 3)}, f, ensure_ascii=False, indent=2)
+    print_summary(summary, elapsed_time)
+    print(f"汇总已保存到: {output_dir / SUMMARY_FILENAME}")
+    return 0 if all(result['status'] in ('ok', 'skipped') for result in summary) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
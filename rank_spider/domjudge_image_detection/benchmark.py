@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import io
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from detect import load_image, detect_table_regions
+from convert import LazyOCR
+from pipeline import recognize_cells
+from srk import check_data, convert_row, detect_background_colors
+from ocr_server import DEFAULT_ADDRESS, connect_ocr_server
+from ocr_backends import BACKENDS
+from synth import add_render_args, generate_board, render_board, render_options
+from lazy import lazy_import
+np = lazy_import('numpy')
+
+# 单元格准确率的分组
+ACCURACY_GROUPS = ('header', 'team', 'score', 'status', 'verdict', 'color')
+
+# 表头颜色与真实颜色的 L1 距离不超过该值时视为正确
+COLOR_TOLERANCE = 30
+
+# 测试启动耗时的命令行工具，cv2、numpy 和OCR模型都应推迟到真正用到时再导入
+STARTUP_SCRIPTS = ('detect.py', 'convert.py', 'srk.py', 'pipeline.py', 'batch.py', 'ocr_server.py',
+                   'stitch.py', 'synth.py', 'benchmark.py')
+
+# 每个启动命令的重复次数，取最小值以排除磁盘缓存等干扰
+STARTUP_REPEATS = 3
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='在合成榜单上测试检测和识别流程的各阶段耗时和单元格准确率',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('input', nargs='?', help='synth.py 生成的目录，不提供时按下列参数在内存中生成榜单')
+    parser.add_argument('-n', '--boards', type=int, default=3, help='生成的榜单数量')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子，第 i 张榜单使用 seed + i')
+    add_render_args(parser)
+    parser.add_argument('-b', '--batch-size', type=int, default=16, help='批量识别时每批的单元格数量')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='识别进程数')
+    parser.add_argument('--backend', choices=BACKENDS, default='paddle', help='OCR后端')
+    parser.add_argument('--ocr-server', nargs='?', const=DEFAULT_ADDRESS,
+                        help='使用常驻OCR服务识别，可指定服务地址，不提供地址时使用 ocr_server.py 的默认地址；服务未运行时使用本地OCR后端')
+    parser.add_argument('--rows', action='store_true', help='整行识别表格主体')
+    parser.add_argument('--digits', action='store_true', help='数字列使用模板匹配识别')
+    parser.add_argument('--no-verdict', action='store_true', help='不按背景色判定状态单元格的结果')
+    parser.add_argument('--no-ocr', action='store_true', help='只测试检测，不加载OCR模型')
+    parser.add_argument('--no-startup', action='store_true', help='不测试各命令行工具的启动耗时')
+    parser.add_argument('--report', help='将每张榜单的结果和汇总保存为 JSON 文件')
+    return parser.parse_args()
+
+
+def parse_color(color):
+    """解析 rgb(r, g, b) 格式的颜色字符串，无法解析时为 None"""
+    match = re.match(r'rgb\((\d+), (\d+), (\d+)\)', color or '')
+    return tuple(int(v) for v in match.groups()) if match else None
+
+
+def load_boards(input_dir):
+    """
+    读取 synth.py 生成的榜单截图和真实结果
+    :param input_dir: synth.py 的输出目录
+    :return: [(名称, 真实结果, 图片路径)] 列表
+    """
+    boards = []
+    for result_path in sorted(Path(input_dir).glob('*.result.json')):
+        name = result_path.name[:-len('.result.json')]
+        with open(result_path, 'r', encoding='utf-8') as f:
+            board = json.load(f)
+        with open(result_path.parent / f"{name}.srk.json", 'r', encoding='utf-8') as f:
+            srk = json.load(f)
+        board['problem_colors'] = [parse_color(problem['style']['backgroundColor']) for problem in srk['problems']]
+        boards.append((name, board, str(result_path.parent / f"{name}.png")))
+    return boards
+
+
+def count_accuracy(board, header_rec_texts, body_rec_texts, body_verdicts, problem_colors):
+    """
+    按分组统计识别结果与真实结果一致的单元格数量
+    :return: {分组: [正确数, 总数]}
+    """
+    counts = {group: [0, 0] for group in ACCURACY_GROUPS}
+
+    def add(group, correct):
+        counts[group][0] += int(correct)
+        counts[group][1] += 1
+
+    for truth, texts in zip(board['header'], header_rec_texts):
+        add('header', truth == texts)
+    for row_idx, (truth_row, row) in enumerate(zip(board['body'], body_rec_texts)):
+        for col, (truth, texts) in enumerate(zip(truth_row, row)):
+            add('team' if col == 0 else 'score' if col == 1 else 'status', truth == texts)
+        if body_verdicts is not None:
+            for truth, verdict in list(zip(board['verdicts'][row_idx], body_verdicts[row_idx]))[2:]:
+                add('verdict', truth == verdict)
+    for truth, color in zip(board['problem_colors'], problem_colors):
+        color = parse_color(color)
+        add('color', color is not None and sum(abs(a - b) for a, b in zip(truth, color)) <= COLOR_TOLERANCE)
+    return counts
+
+
+def benchmark_board(board, image, ocr, args):
+    """
+    依次运行检测、识别和转换，记录各阶段耗时，检测结果与真实结果的行列数一致时统计单元格准确率
+    :param board: 真实结果
+    :param image: 图片路径或RGB图像数组
+    :param ocr: OCR后端实例，只测试检测时为 None
+    :param args: 命令行参数
+    :return: {"timings", "detected", "expected", "size", "cells", "warnings", "accuracy"}
+    """
+    timings = {}
+    start = time.perf_counter()
+    img = load_image(image)
+    timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        regions = detect_table_regions(img)
+    timings['detect'] = time.perf_counter() - start
+    rows = [row for row in regions['body']['rows'] if row['cells']]
+    result = {
+        "timings": timings,
+        "detected": [len(rows), len(regions['header_cells'])],
+        "expected": [len(board['body']), len(board['header'])],
+        "size": f"{img.shape[1]}x{img.shape[0]}",
+        "cells": len(regions['header_cells']) + sum(len(row['cells']) for row in rows),
+    }
+    if result['detected'] != result['expected'] or ocr is None:
+        return result
+
+    start = time.perf_counter()
+    bounds = regions['table_bounds'] if args.rows else {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        header_rec_texts, body_rec_texts, header_images, body_verdicts, _ = recognize_cells(
+            ocr, img, regions['header_cells'], rows, args.batch_size, None, not args.no_verdict, args.workers,
+            args.digits, bounds.get('x0'), bounds.get('x1'))
+    timings['recognize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    input_data = {"header": header_rec_texts, "body": body_rec_texts}
+    if body_verdicts is not None:
+        input_data["verdicts"] = body_verdicts
+    warnings = []
+    check_data(input_data, warnings)
+    # 与 srk.convert_problems 相同的背景色检测，按表头单元格逐个对应，不受表头识别结果为空的影响
+    problem_colors = detect_background_colors(header_images[2:])
+    if not warnings:
+        for row, verdicts in zip(body_rec_texts, body_verdicts or [None] * len(body_rec_texts)):
+            convert_row(row, verdicts)
+    timings['convert'] = time.perf_counter() - start
+
+    result['warnings'] = len(warnings)
+    result['accuracy'] = count_accuracy(board, header_rec_texts, body_rec_texts, body_verdicts, problem_colors)
+    return result
+
+
+def measure_startup(board):
+    """
+    测试各命令行工具的启动耗时：运行 --help，以及用 srk.py 校验一份识别结果（只处理 JSON，不需要 cv2 和 numpy）
+    命令失败时耗时没有意义（如导入时出错会更快退出），抛出 ValueError
+    :param board: 真实结果，写入临时文件后交给 srk.py 校验
+    :return: {命令: 耗时}
+    """
+    script_dir = Path(__file__).resolve().parent
+    commands = {f"{script} --help": [str(script_dir / script), '--help'] for script in STARTUP_SCRIPTS}
+    startup = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        result_path = Path(temp_dir) / 'result.json'
+        with open(result_path, 'w', encoding='utf-8') as f:
+            json.dump({"header": board['header'], "body": board['body'], "verdicts": board['verdicts']},
+                      f, ensure_ascii=False)
+        # 只校验不转换，测试的是不需要 cv2 和 numpy 的 JSON 路径
+        commands['srk.py <result.json>'] = [str(script_dir / 'srk.py'), str(result_path)]
+        for name, command in commands.items():
+            times = []
+            for _ in range(STARTUP_REPEATS):
+                start = time.perf_counter()
+                process = subprocess.run([sys.executable, *command], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                times.append(time.perf_counter() - start)
+                if process.returncode != 0:
+                    output = process.stdout.decode('utf-8', errors='replace').strip().splitlines()
+                    raise ValueError(f"{name} 退出码为 {process.returncode}: {output[-1] if output else ''}")
+            startup[name] = min(times)
+    return startup
+
+
+def print_report(results, ocr_init, startup):
+    """打印每张榜单的结果和汇总"""
+    print("\n" + "=" * 70)
+    print(f"{'榜单':<16}{'尺寸':>12}{'行x列':>10}{'读取':>8}{'检测':>8}{'识别':>8}{'转换':>8}")
+    print("=" * 70)
+    for result in results:
+        timings = result['timings']
+        status = 'x'.join(map(str, result['detected']))
+        if result['detected'] != result['expected']:
+            status += '!'
+        cols = ''.join(f"{timings[stage]:>8.3f}" if stage in timings else f"{'-':>8}"
+                       for stage in ('load', 'detect', 'recognize', 'convert'))
+        print(f"{result['name']:<16}{result['size']:>12}{status:>10}{cols}")
+    print("=" * 70)
+    detected = sum(1 for result in results if result['detected'] == result['expected'])
+    print(f"检测行列数正确: {detected}/{len(results)}（! 表示与真实结果不一致，不再识别）")
+    if ocr_init is not None:
+        print(f"OCR初始化耗时: {ocr_init:.3f}")
+    for stage in ('load', 'detect', 'recognize', 'convert'):
+        values = [result['timings'][stage] for result in results if stage in result['timings']]
+        if values:
+            print(f"{stage:<10} 平均 {np.mean(values):.3f}  最大 {np.max(values):.3f}  共 {np.sum(values):.3f}")
+    recognized = [result for result in results if 'recognize' in result['timings']]
+    if recognized:
+        cells = sum(result['cells'] for result in recognized)
+        print(f"识别速度: {cells / sum(result['timings']['recognize'] for result in recognized):.1f} 单元格/秒")
+        for group in ACCURACY_GROUPS:
+            correct = sum(result['accuracy'][group][0] for result in recognized)
+            total = sum(result['accuracy'][group][1] for result in recognized)
+            if total:
+                print(f"准确率 {group:<8} {correct}/{total} = {correct / total:.2%}")
+    if startup:
+        print("=" * 70)
+        for name, value in startup.items():
+            print(f"启动耗时 {name:<24} {value:.3f}")
+    print("=" * 70)
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    if args.input:
+        boards = load_boards(args.input)
+        if not boards:
+            print(f"错误: {args.input} 中没有 synth.py 生成的榜单")
+            return 1
+    else:
+        boards = []
+        for i in range(args.boards):
+            seed = args.seed + i
+            try:
+                board = generate_board(args.teams, args.problems, seed)
+            except ValueError as e:
+                print(f"错误: {e}")
+                return 1
+            boards.append((f"board_{seed}", board, render_board(board, seed=seed, **render_options(args))))
+
+    ocr = None
+    ocr_init = None
+    if not args.no_ocr:
+        ocr = connect_ocr_server(args.ocr_server, args.backend)
+        if ocr is None and args.ocr_server:
+            print(f"OCR服务 {args.ocr_server} 不可用，使用本地OCR后端: {args.backend}")
+        if ocr is not None:
+            print(f"使用OCR服务: {args.ocr_server}")
+        elif args.workers <= 1:
+            # 单独统计模型加载耗时，不计入第一张榜单的识别耗时
+            ocr = LazyOCR(args.backend, args.batch_size if args.batch_size > 1 else None)
+            start = time.perf_counter()
+            ocr.recognize([np.full((32, 32, 3), 255, dtype=np.uint8)])
+            ocr_init = time.perf_counter() - start
+        else:
+            ocr = LazyOCR(args.backend, args.batch_size if args.batch_size > 1 else None)
+
+    results = []
+    for name, board, image in boards:
+        print(f"测试 {name}...")
+        results.append({"name": name, **benchmark_board(board, image, ocr, args)})
+
+    startup = None
+    if not args.no_startup:
+        print("测试启动耗时...")
+        try:
+            startup = measure_startup(boards[0][1])
+        except ValueError as e:
+            print(f"错误: 启动耗时测试失败，{e}")
+            return 1
+
+    print_report(results, ocr_init, startup)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({"ocr_init": ocr_init, "startup": startup, "boards": results}, f, ensure_ascii=False, indent=2)
+        print(f"测试结果已保存到: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 import argparse
+import contextlib
 import os
 import json
 import csv
 import shutil
 import time
+from multiprocessing import get_context
 from pathlib import Path
-from paddleocr import PaddleOCR
+from ocr_cache import OCRCache
+from verdict import FIRST_STATUS_COL, classify_verdicts
+from digits import DIGIT_CHARS, SCORE_COL, DigitRecognizer
+from srk import check_score
+from detect import optimize_cell_image
+from ocr_server import DEFAULT_ADDRESS, OCRClient, connect_ocr_server
+from ocr_backends import BACKENDS, init_backend
+from lazy import lazy_import
+cv2 = lazy_import('cv2')
 
 
 def parse_args():
@@ -14,17 +24,44 @@ def parse_args():
     parser = argparse.ArgumentParser(description='表格图片经检测结果 OCR 识别')
     parser.add_argument('input', help='输入数据目录路径')
     parser.add_argument('-o', '--output', required=True, help='输出目录路径')
+    parser.add_argument('-b', '--batch-size', type=int, default=16, help='批量识别时每批的单元格数量，1 表示逐个识别')
+    parser.add_argument('--cache', help='OCR结果缓存文件路径，像素一致的单元格直接复用已识别的结果（仅批量识别时使用）')
+    parser.add_argument('--cache-tolerance', type=int, default=0, help='缓存按差值哈希模糊匹配时允许的汉明距离，0 表示只匹配像素完全一致的单元格')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='识别进程数，每个进程各自加载一个OCR模型（仅批量识别时使用）')
+    parser.add_argument('--no-verdict', action='store_true', help='不按背景色判定状态单元格的结果（仅批量识别时使用）')
+    parser.add_argument('--rows', action='store_true', help='整行识别表格主体，按表头的列范围分配文本，需要 detect.py --rows 保存的行图片')
+    parser.add_argument('--backend', choices=BACKENDS, default='paddle', help='OCR后端，tesseract 启动和识别更快，准确率低于 paddle')
+    parser.add_argument('--resume', action='store_true', help='保留输出目录，复用上次运行保存的OCR结果，从中断的位置继续识别（仅批量识别时使用）')
+    parser.add_argument('--ocr-server', nargs='?', const=DEFAULT_ADDRESS,
+                        help='使用常驻OCR服务识别，可指定服务地址，不提供地址时使用 ocr_server.py 的默认地址；服务未运行时使用本地OCR后端')
+    parser.add_argument('--digits', action='store_true', help='数字列使用模板匹配识别，只有无法匹配的单元格使用OCR（仅批量识别时使用）')
     return parser.parse_args()
 
 
-def init_paddleocr():
-    """初始化PaddleOCR实例"""
-    return PaddleOCR(
-        use_doc_orientation_classify=False,
-        use_doc_unwarping=False,
-        use_textline_orientation=False,
-        enable_mkldnn=False
-    )
+# 批量识别时OCR结果的检查点文件，保存在输出目录中，--resume 时复用
+CHECKPOINT_FILENAME = "ocr_cache.json"
+
+# 每识别多少个单元格保存一次检查点
+CHECKPOINT_INTERVAL = 256
+
+# 数字列模板匹配时选取种子单元格的最大轮数，种子中缺少某个数字时再选取一轮
+BOOTSTRAP_ROUNDS = 3
+
+
+class LazyOCR:
+    """第一次识别时才初始化OCR后端，所有单元格都命中缓存时不加载模型"""
+    
+    def __init__(self, backend='paddle', batch_size=None, cpu_threads=None):
+        self.name = backend
+        self.batch_size = batch_size
+        self.cpu_threads = cpu_threads
+        self.ocr = None
+    
+    def recognize(self, inputs, names=None, debug_dir=None):
+        if self.ocr is None:
+            print(f"初始化OCR后端: {self.name}...")
+            self.ocr = init_backend(self.name, self.batch_size, self.cpu_threads)
+        return self.ocr.recognize(inputs, names, debug_dir)
 
 
 def process_cell_image(ocr, image_path, output_dir, filename):
@@ -32,43 +69,651 @@ def process_cell_image(ocr, image_path, output_dir, filename):
     处理单个单元格图片的OCR识别
     
     Args:
-        ocr: PaddleOCR实例
+        ocr: OCR后端实例
         image_path: 图片路径
         output_dir: 输出目录
-        filename: 文件名（用于创建子目录）
+        filename: 文件名（用于保存调试信息）
     
     Returns:
-        tuple: (识别出的文本字符串, 原始rec_texts数组)
-    """
-    # 创建输出子目录
-    filename_without_ext = Path(filename).stem
-    cell_output_dir = Path(output_dir) / "ocr_result" / filename_without_ext
-    cell_output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 执行OCR识别
-    result = ocr.predict(input=str(image_path))
-    
-    # 保存调试信息
-    for res in result:
-        res.save_to_img(str(cell_output_dir))
-        res.save_to_json(str(cell_output_dir))
-    
-    # 提取识别文本
-    rec_texts = []
-    if result and len(result) > 0:
-        # 从保存的JSON文件中读取结果
-        json_file = cell_output_dir / f"{filename_without_ext}_res.json"
-        if json_file.exists():
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    json_data = json.load(f)
-                    rec_texts = json_data.get('rec_texts', [])
-            except Exception as e:
-                print(f"警告: 无法读取JSON文件 {json_file}: {e}")
-    
-    # 返回拼接的文本字符串和原始rec_texts数组
+        tuple: (识别出的文本字符串, 原始rec_texts数组, 每段文本的置信度数组)
+    """
+    # 执行OCR识别，调试信息保存到 ocr_result/<文件名> 目录
+    result = ocr.recognize([str(image_path)], [filename], output_dir)[0]
+    rec_texts = result['rec_texts']
+    
+    # 返回拼接的文本字符串、原始rec_texts数组和置信度
     text_string = '\\n'.join(rec_texts) if rec_texts else ""
-    return text_string, rec_texts
+    return text_string, rec_texts, result['rec_scores']
+
+
+# 工作进程内的OCR后端实例，每个进程各自初始化
+_worker_ocr = None
+
+
+def _init_worker(backend, batch_size, cpu_threads):
+    global _worker_ocr
+    _worker_ocr = init_backend(backend, batch_size, cpu_threads)
+
+
+def _predict_in_worker(task):
+    return predict_batch(_worker_ocr, *task)
+
+
+class OCRPool:
+    """
+    常驻的识别进程池，多次识别（如批量处理多张榜单）共用同一组工作进程，每个进程只加载一次OCR模型
+
+    工作进程在第一次识别时才启动，所有单元格都命中缓存时不加载模型
+    """
+    
+    def __init__(self, backend='paddle', workers=2, batch_size=None):
+        self.name = backend
+        self.workers = workers
+        self.batch_size = batch_size
+        self._pool = None
+    
+    @property
+    def pool(self):
+        if self._pool is None:
+            # 与 predict_batches 一致，使用 spawn 启动工作进程，推理线程数按进程数均分
+            cpu_threads = max(1, (os.cpu_count() or 1) // self.workers)
+            print(f"启动 {self.workers} 个共享识别进程，每个进程 {cpu_threads} 个推理线程")
+            self._pool = get_context('spawn').Pool(self.workers, initializer=_init_worker,
+                                                   initargs=(self.name, self.batch_size, cpu_threads))
+        return self._pool
+    
+    def recognize(self, inputs, names=None, debug_dir=None):
+        return self.pool.apply(_predict_in_worker, ((inputs, names, debug_dir),))
+    
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+
+@contextlib.contextmanager
+def shared_pool(ocr, batch_size, workers=1):
+    """
+    一次转换中的多轮识别（如模板匹配的种子和回退、整行识别和回退）共用同一组工作进程
+    
+    Args:
+        ocr: OCR后端实例、OCRPool 实例或 OCRClient 实例
+        batch_size: 每批的单元格数量，用于初始化工作进程的OCR后端
+        workers: 识别进程数，大于 1 且 ocr 为单个OCR后端时临时创建 OCRPool，退出时关闭
+    
+    Returns:
+        各轮识别使用的 ocr
+    """
+    if workers <= 1 or isinstance(ocr, (OCRClient, OCRPool)):
+        yield ocr
+        return
+    pool = OCRPool(getattr(ocr, 'name', 'paddle'), workers, batch_size)
+    try:
+        yield pool
+    finally:
+        pool.close()
+
+
+def predict_batch(ocr, inputs, names=None, debug_dir=None):
+    """
+    识别一批图像
+    
+    Args:
+        ocr: OCR后端实例
+        inputs: 图片路径或图像数组列表
+        names: 与 inputs 对应的文件名，用于保存调试信息
+        debug_dir: 调试信息输出目录，不提供时不保存
+    
+    Returns:
+        list: 每个图像的 {"rec_texts", "rec_scores", "rec_boxes"} 列表，rec_boxes 为 [x0, y0, x1, y1] 列表
+    """
+    return ocr.recognize(inputs, names, debug_dir)
+
+
+def predict_batches(ocr, tasks, batch_size, workers=1):
+    """
+    按批次识别，依次返回每批的结果
+    
+    Args:
+        ocr: OCR后端实例
+        tasks: predict_batch 参数元组的可迭代对象，按需生成，避免一次性准备所有图像
+        batch_size: 每批的图像数量，用于初始化工作进程的OCR后端
+        workers: 识别进程数，大于 1 时每个进程各自初始化一个与 ocr 同名的OCR后端，从任务队列中领取批次
+    """
+    if isinstance(ocr, OCRClient):
+        # 使用常驻的OCR服务识别，不再启动工作进程
+        for task in tasks:
+            yield ocr.predict_batch(*task)
+    elif isinstance(ocr, OCRPool):
+        # 使用共享的识别进程池，不再为本次识别单独启动工作进程
+        yield from ocr.pool.imap(_predict_in_worker, tasks)
+    elif workers > 1:
+        # 使用 spawn 启动工作进程，避免 fork 已加载推理库的进程；推理线程数按进程数均分
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"启动 {workers} 个识别进程，每个进程 {cpu_threads} 个推理线程")
+        initargs = (getattr(ocr, 'name', 'paddle'), batch_size, cpu_threads)
+        with get_context('spawn').Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            # 各批次的结果按提交顺序返回
+            yield from pool.imap(_predict_in_worker, tasks)
+    else:
+        for task in tasks:
+            yield predict_batch(ocr, *task)
+
+
+def load_ocr_input(image, prepare=None):
+    """读取送入OCR的图像，图片路径按 OpenCV 默认的BGR读取，无法读取时抛出 ValueError"""
+    if isinstance(image, (str, Path)):
+        img = cv2.imread(str(image))
+        if img is None:
+            raise ValueError(f"无法读取图片: {image}")
+        return img
+    return prepare(image) if prepare else image
+
+
+def to_bgr(img):
+    """RGB图像转换为OCR使用的BGR图像"""
+    return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+
+def load_rgb(image):
+    """读取RGB图像，图像数组按RGB直接返回"""
+    if isinstance(image, (str, Path)):
+        return cv2.cvtColor(load_ocr_input(image), cv2.COLOR_BGR2RGB)
+    return image
+
+
+def recognize_batches(ocr, jobs, batch_size, prepare=None, debug_dir=None, cache=None, workers=1, scores=None):
+    """
+    批量识别单元格图片
+    
+    Args:
+        ocr: OCR后端实例
+        jobs: [(key, group, input)] 列表，input 为图片路径或图像数组；按 group 排序后分批，
+              同一列的单元格尺寸相近，放在同一批次中推理
+        batch_size: 每批的单元格数量
+        prepare: 送入OCR前对图像数组 input 的处理（如颜色空间转换），按批次调用，避免一次性复制所有图像
+        debug_dir: OCR调试信息输出目录，只保存以图片路径输入的单元格
+        cache: OCRCache 实例，命中缓存的单元格不再识别，像素一致的单元格只识别一次
+        workers: 识别进程数，大于 1 时每个进程各自初始化一个与 ocr 同名的OCR后端，从任务队列中领取批次
+        scores: 提供时按 key 填入每段文本的置信度数组，缓存中没有置信度的结果为 None
+    
+    Returns:
+        dict: {key: rec_texts数组}
+    """
+    results = {}
+    if scores is None:
+        scores = {}
+    # 像素哈希: 共享同一识别结果的单元格 key 列表
+    duplicates = {}
+    if cache is not None:
+        pending = []
+        for key, group, image in jobs:
+            img = load_ocr_input(image, prepare)
+            pixel_key = cache.key(img)
+            if pixel_key in duplicates:
+                duplicates[pixel_key].append(key)
+                cache.hits += 1
+                continue
+            entry = cache.lookup(img, pixel_key)
+            if entry is not None:
+                results[key] = list(entry['rec_texts'])
+                scores[key] = entry.get('rec_scores')
+            else:
+                duplicates[pixel_key] = [key]
+                # 图片路径只读取一次，识别和写入缓存都使用这次读取的图像
+                pending.append((key, group, image, pixel_key, img if isinstance(image, (str, Path)) else None))
+        print(f"OCR缓存命中 {len(jobs) - len(pending)}/{len(jobs)} 个单元格")
+    else:
+        pending = [(key, group, image, None, None) for key, group, image in jobs]
+    
+    pending.sort(key=lambda job: job[1])
+    batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+    
+    def ocr_input(job):
+        # 已读取的图片直接使用；未读取的图片路径交给OCR读取，图像数组按批次处理，避免一次性复制所有图像
+        _, _, image, _, img = job
+        if img is not None:
+            return img
+        return image if isinstance(image, (str, Path)) else load_ocr_input(image, prepare)
+    
+    def tasks():
+        for batch in batches:
+            inputs = [ocr_input(job) for job in batch]
+            names = [Path(job[2]).name if isinstance(job[2], (str, Path)) else None for job in batch]
+            yield inputs, names, debug_dir
+    
+    def collect(outputs):
+        done = 0
+        # 各批次的结果按提交顺序返回，与 batches 一一对应
+        for batch, batch_results in zip(batches, outputs):
+            for job, result in zip(batch, batch_results):
+                key, pixel_key = job[0], job[3]
+                results[key] = result['rec_texts']
+                scores[key] = result['rec_scores']
+                if cache is not None:
+                    img = job[4] if job[4] is not None else load_ocr_input(job[2], prepare)
+                    cache.put(img, result['rec_texts'], pixel_key, result['rec_scores'])
+                    for duplicate in duplicates[pixel_key][1:]:
+                        results[duplicate] = list(result['rec_texts'])
+                        scores[duplicate] = list(result['rec_scores'])
+            done += len(batch)
+            print(f"批量识别进度: {done}/{len(pending)}")
+    
+    if batches:
+        collect(predict_batches(ocr, tasks(), batch_size, workers))
+    return results
+
+
+def assign_columns(rec_texts, rec_boxes, columns, min_overlap=0.8):
+    """
+    按列的x范围把整行识别出的文本分配到各列
+    
+    Args:
+        rec_texts: 整行识别出的rec_texts数组
+        rec_boxes: 与 rec_texts 对应的 [x0, y0, x1, y1] 列表
+        columns: 每列的 (x0, x1) 范围，坐标与 rec_boxes 一致
+        min_overlap: 文本框落在所属列内的最小宽度占比
+    
+    Returns:
+        list: 每列的文本索引数组，索引指向 rec_texts，同一列内按从上到下、从左到右排列；
+              有文本框跨列或不在任何列内时为 None
+    """
+    column_boxes = [[] for _ in columns]
+    for index, (x0, y0, x1, y1) in enumerate(rec_boxes[:len(rec_texts)]):
+        overlaps = [min(x1, cx1) - max(x0, cx0) for cx0, cx1 in columns]
+        col = max(range(len(columns)), key=lambda i: overlaps[i])
+        if overlaps[col] < min_overlap * max(x1 - x0, 1):
+            return None
+        column_boxes[col].append((index, x0, y0, y1))
+    
+    result = []
+    for boxes in column_boxes:
+        # 按纵向中心分行，中心距离不超过行高一半的文本框视为同一行
+        boxes.sort(key=lambda box: box[2] + box[3])
+        lines = []
+        for box in boxes:
+            center = (box[2] + box[3]) / 2
+            if lines and center - lines[-1][0] <= (lines[-1][1][0][3] - lines[-1][1][0][2]) / 2:
+                lines[-1][1].append(box)
+            else:
+                lines.append((center, [box]))
+        result.append([box[0] for _, line in lines for box in sorted(line, key=lambda box: box[1])])
+    return result
+
+
+def recognize_rows(ocr, strips, header_cells, table_x0, batch_size, prepare=None, workers=1, debug_dir=None):
+    """
+    整行识别表格主体，每行只调用一次OCR
+    
+    Args:
+        ocr: OCR后端实例
+        strips: 每行图像（图片路径或图像数组）列表，图像从表格左边界开始
+        header_cells: 表头单元格列表，按其x范围分列
+        table_x0: 表格左边界在原图中的x坐标
+        batch_size: 每批的行数
+        prepare: 送入OCR前对图像数组的处理
+        workers: 识别进程数
+        debug_dir: OCR调试信息输出目录，只保存以图片路径输入的行
+    
+    Returns:
+        list: 每行的 (各列的rec_texts数组列表, 各列的置信度数组列表)，无法按列分配的行为 None
+    """
+    columns = [(cell['x0'] - table_x0, cell['x1'] - table_x0) for cell in header_cells]
+    batches = [strips[start:start + batch_size] for start in range(0, len(strips), batch_size)]
+    
+    def tasks():
+        for batch in batches:
+            inputs = [strip if isinstance(strip, (str, Path)) else load_ocr_input(strip, prepare) for strip in batch]
+            names = [Path(strip).name if isinstance(strip, (str, Path)) else None for strip in batch]
+            yield inputs, names, debug_dir
+    
+    results = []
+    if batches:
+        for outputs in predict_batches(ocr, tasks(), batch_size, workers):
+            for result in outputs:
+                indices = assign_columns(result['rec_texts'], result['rec_boxes'], columns)
+                if indices is None:
+                    results.append(None)
+                    continue
+                results.append(([[result['rec_texts'][i] for i in col] for col in indices],
+                                [[result['rec_scores'][i] for i in col] for col in indices]))
+            print(f"整行识别进度: {len(results)}/{len(strips)}")
+    return results
+
+
+def recognize_table_rows(ocr, header_jobs, strips, header_cells, body_rows, table_x0, batch_size, debug_dir=None,
+                         cache=None, classify=False, workers=1, digits=False, scores=None, penalty=20):
+    """
+    整行识别表格主体，无法按列分配文本的行再逐个单元格识别
+    
+    Args:
+        ocr: OCR后端实例
+        header_jobs: 表头单元格的 [(key, group, input)] 列表，input 为图片路径或RGB图像数组
+        strips: 每行图像列表，图片路径或RGB图像数组，图像从表格左边界开始
+        header_cells: 表头单元格列表
+        body_rows: 表格主体行列表，与 strips 一一对应
+        table_x0: 表格左边界在原图中的x坐标
+        batch_size: 每批的行数或单元格数量
+        debug_dir: OCR调试信息输出目录
+        cache: OCRCache 实例，只用于逐个识别的单元格
+        classify: 是否按背景色判定状态单元格的结果，判定为空的单元格结果为空
+        workers: 识别进程数
+        digits: 逐个识别的数字列是否使用模板匹配识别
+        scores: 提供时按 key 填入每段文本的置信度数组
+        penalty: 每次错误提交的罚时（分钟），用于检查模板匹配结果
+    
+    Returns:
+        tuple: ({key: rec_texts数组}, {key: 状态判定结果})
+    """
+    if scores is None:
+        scores = {}
+    print(f"整行识别 {len(strips)} 行...")
+    # 整行识别和逐个识别的回退共用同一组工作进程
+    with shared_pool(ocr, batch_size, workers) as ocr:
+        row_results = recognize_rows(ocr, strips, header_cells, table_x0, batch_size, to_bgr, workers, debug_dir)
+        results = {}
+        verdicts = {}
+        jobs = list(header_jobs)
+        failed = 0
+        for row_idx, (strip, row, row_result) in enumerate(zip(strips, body_rows, row_results)):
+            keys = [(row_idx, col) for col in range(len(row['cells']))]
+            if row_result is not None:
+                results.update(zip(keys, row_result[0]))
+                scores.update(zip(keys, row_result[1]))
+                if not classify:
+                    continue
+            # 单元格从行图像中裁剪，与逐个识别时使用的优化单元格图像一致；按列分配成功的行只需要状态单元格
+            rgb = load_rgb(strip)
+            first = 0 if row_result is None else FIRST_STATUS_COL
+            cell_images = dict(zip(keys[first:], (optimize_cell_image(rgb, {
+                'x0': cell['x0'] - table_x0,
+                'x1': cell['x1'] - table_x0,
+                'y0': cell['y0'] - row['y0'],
+                'y1': cell['y1'] - row['y0']
+            })[0] for cell in row['cells'][first:])))
+            if classify:
+                status_keys = keys[FIRST_STATUS_COL:]
+                for key, verdict in zip(status_keys, classify_verdicts([cell_images[key] for key in status_keys])):
+                    verdicts[key] = verdict
+                    if verdict == '':
+                        results[key] = []
+                        scores[key] = []
+            if row_result is None:
+                failed += 1
+                jobs.extend((key, key[1], cell_img) for key, cell_img in cell_images.items() if verdicts.get(key) != '')
+        print(f"整行识别完成: {len(strips) - failed} 行按列分配，{failed} 行有文本跨列，改为逐个单元格识别")
+        
+        results.update(recognize_jobs(ocr, jobs, batch_size, to_bgr, debug_dir, cache, workers, digits, scores=scores,
+                                      verdicts=verdicts, penalty=penalty))
+    return results, verdicts
+
+
+def recognize_jobs(ocr, jobs, batch_size, prepare=None, debug_dir=None, cache=None, workers=1, digits=False,
+                   bootstrap=32, scores=None, verdicts=None, penalty=20):
+    """
+    识别单元格，数字列可以改用模板匹配
+    
+    开启 digits 时，先用OCR识别文本列和从数字列中均匀选取的 bootstrap 个单元格，用这些单元格的识别结果
+    学习字形模板，其余数字列单元格用模板匹配识别，无法可靠匹配的再交给OCR。种子中缺少某个数字时再选取一轮，
+    最多 BOOTSTRAP_ROUNDS 轮后仍缺少时所有数字列单元格都交给OCR；解题数和罚时与各题状态不一致的行，模板匹配的单元格也重新交给OCR
+    
+    Args:
+        ocr: OCR后端实例
+        jobs: [(key, group, input)] 列表，同 recognize_batches，key 为 (行, 列) 或 ('header', 列)
+        batch_size: 每批的单元格数量
+        prepare: 送入OCR前对 input 的处理
+        debug_dir: OCR调试信息输出目录
+        cache: OCRCache 实例
+        workers: 识别进程数，各轮识别共用同一组工作进程
+        digits: 是否对数字列使用模板匹配
+        bootstrap: 用于学习模板的数字列单元格数量
+        scores: 提供时按 key 填入每段文本的置信度数组，模板匹配的置信度为 1 减去字形与模板的最大差异
+        verdicts: {key: 状态判定结果}，用于检查模板匹配结果时判断哪些题目已通过
+        penalty: 每次错误提交的罚时（分钟），用于检查模板匹配结果
+    
+    Returns:
+        dict: {key: rec_texts数组}
+    """
+    if not digits:
+        return recognize_batches(ocr, jobs, batch_size, prepare, debug_dir, cache, workers, scores)
+    if scores is None:
+        scores = {}
+    
+    numeric = [job for job in jobs if job[0][0] != 'header' and job[0][1] >= SCORE_COL]
+    text_jobs = [job for job in jobs if job[0][0] == 'header' or job[0][1] < SCORE_COL]
+    step = max(1, len(numeric) // bootstrap) if bootstrap > 0 else 1
+    with shared_pool(ocr, batch_size, workers) as ocr:
+        results = {}
+        recognizer = DigitRecognizer()
+        seeds = []
+        learned = 0
+        # 每轮从数字列中均匀选取 bootstrap 个未选过的单元格，学习到全部数字或达到轮数上限为止
+        for offset in range(min(step, BOOTSTRAP_ROUNDS) if bootstrap > 0 else 0):
+            round_seeds = numeric[offset::step][:bootstrap]
+            results.update(recognize_batches(ocr, (text_jobs if offset == 0 else []) + round_seeds, batch_size,
+                                             prepare, debug_dir, cache, workers, scores))
+            learned += sum(recognizer.learn(load_ocr_input(job[2], prepare), results[job[0]]) for job in round_seeds)
+            seeds.extend(round_seeds)
+            if recognizer.is_complete():
+                break
+        if not seeds:
+            results.update(recognize_batches(ocr, text_jobs, batch_size, prepare, debug_dir, cache, workers, scores))
+        seed_keys = {job[0] for job in seeds}
+        matched = {}
+        if recognizer.is_complete():
+            for job in numeric:
+                if job[0] not in seed_keys:
+                    result = recognizer.recognize_with_scores(load_ocr_input(job[2], prepare))
+                    if result is not None:
+                        matched[job[0]] = result
+        elif numeric:
+            missing = ''.join(char for char in DIGIT_CHARS if char not in recognizer.samples)
+            print(f"数字列模板匹配: 种子单元格中没有数字 {missing}，数字列全部交给OCR")
+        fallback = [job for job in numeric if job[0] not in seed_keys and job[0] not in matched]
+        print(f"数字列模板匹配: 从 {learned}/{len(seeds)} 个单元格学习了 {len(recognizer.samples)} 种字符，"
+              f"识别 {len(matched)} 个单元格，{len(fallback)} 个交给OCR")
+        if fallback:
+            results.update(recognize_batches(ocr, fallback, batch_size, prepare, debug_dir, cache, workers, scores))
+        
+        # 所有单元格都有结果后按行检查，模板匹配的误识别（如学习到的字形相近）会使解题数或罚时对不上
+        rejected = check_matched_rows(results, matched, verdicts, penalty)
+        recheck = [job for job in numeric if job[0] in matched and job[0][0] in rejected]
+        for key, (rec_texts, rec_scores) in matched.items():
+            if key[0] not in rejected:
+                results[key], scores[key] = rec_texts, rec_scores
+        if recheck:
+            print(f"数字列模板匹配: {len(rejected)} 行的解题数或罚时与各题状态不一致，{len(recheck)} 个单元格重新交给OCR")
+            results.update(recognize_batches(ocr, recheck, batch_size, prepare, debug_dir, cache, workers, scores))
+    return results
+
+
+def check_matched_rows(results, matched, verdicts=None, penalty=20):
+    """
+    检查含有模板匹配结果的行，解题数和罚时与各题状态不一致或无法检查时拒绝该行的模板匹配结果
+    
+    Args:
+        results: {key: rec_texts数组}，OCR识别的结果
+        matched: {key: (rec_texts数组, 置信度数组)}，模板匹配的结果
+        verdicts: {key: 状态判定结果}
+        penalty: 每次错误提交的罚时（分钟）
+    
+    Returns:
+        set: 拒绝的行号
+    """
+    widths = {}
+    for key in list(results) + list(matched):
+        if key[0] != 'header':
+            widths[key[0]] = max(widths.get(key[0], 0), key[1] + 1)
+    rejected = set()
+    for row_idx in {key[0] for key in matched}:
+        keys = [(row_idx, col) for col in range(widths[row_idx])]
+        row = [matched[key][0] if key in matched else results.get(key, []) for key in keys]
+        row_verdicts = [verdicts.get(key) for key in keys] if verdicts else None
+        warnings = []
+        if not check_score(row_idx, row, warnings, row_verdicts, penalty) or warnings:
+            rejected.add(row_idx)
+    return rejected
+
+
+def collect_scores(scores, results, header_keys, body_keys):
+    """
+    按表头和表格主体的结构整理置信度
+    
+    Args:
+        scores: {key: 置信度数组}
+        results: {key: rec_texts数组}，没有识别结果的单元格置信度为 []
+        header_keys: 表头单元格的 key 列表
+        body_keys: 表格主体每行单元格的 key 列表
+    
+    Returns:
+        dict: {"header": 置信度数组列表, "body": 二维置信度数组列表}，置信度未知（如来自旧版本缓存）时为 None
+    """
+    def cell_scores(key):
+        return scores.get(key) if key in results else []
+    
+    return {
+        "header": [cell_scores(key) for key in header_keys],
+        "body": [[cell_scores(key) for key in keys] for keys in body_keys]
+    }
+
+
+def process_table_batched(ocr, input_dir, output_dir, header_cells, body_rows, batch_size, cache=None, classify=False,
+                          workers=1, digits=False):
+    """
+    批量识别表头和表格主体的所有单元格
+    
+    Args:
+        ocr: OCR后端实例
+        input_dir: 输入目录
+        output_dir: 输出目录
+        header_cells: 表头单元格列表
+        body_rows: 表格主体行列表
+        batch_size: 每批的单元格数量
+        cache: OCRCache 实例
+        classify: 是否按背景色判定状态单元格的结果，判定为空的单元格不再识别
+        workers: 识别进程数
+        digits: 数字列是否使用模板匹配识别
+    
+    Returns:
+        tuple: (表头文本列表, 表头rec_texts数组列表, 表格数据行列表, 表格主体rec_texts数组列表, 状态判定结果列表,
+                置信度 {"header", "body"})，未开启判定时状态判定结果列表为 None
+    """
+    jobs = []
+    
+    def add_job(key, group, cell):
+        filename = cell.get('filename', '')
+        if not filename:
+            return False
+        # 构建图片路径（统一从detection_result_optimized读取）
+        image_path = Path(input_dir) / "detection_result_optimized" / filename
+        if image_path.exists():
+            jobs.append((key, group, str(image_path)))
+        else:
+            print(f"警告: 图片文件不存在: {image_path}")
+        return True
+    
+    # 与 process_cells 一致，跳过没有文件名的单元格，图片不存在的单元格结果为空；表头单独成组
+    header_keys = [('header', i) for i, cell in enumerate(header_cells) if add_job(('header', i), -1, cell)]
+    body_keys = []
+    verdicts = {}
+    for row_idx, row in enumerate(body_rows):
+        start = len(jobs)
+        keys = [(row_idx, col) for col, cell in enumerate(row.get('cells', [])) if add_job((row_idx, col), col, cell)]
+        if keys:  # 只添加非空行
+            body_keys.append(keys)
+        if classify:
+            # 按行判定状态单元格，空单元格直接移出识别队列
+            status_jobs = [job for job in jobs[start:] if job[0][1] >= FIRST_STATUS_COL]
+            images = [load_rgb(job[2]) for job in status_jobs]
+            for job, verdict in zip(status_jobs, classify_verdicts(images)):
+                verdicts[job[0]] = verdict
+            jobs[start:] = [job for job in jobs[start:] if verdicts.get(job[0]) != '']
+    if classify:
+        print(f"状态单元格颜色判定完成: {sum(1 for v in verdicts.values() if v)} 个有提交，"
+              f"{sum(1 for v in verdicts.values() if v == '')} 个空单元格跳过识别，"
+              f"{sum(1 for v in verdicts.values() if v is None)} 个无法判定")
+    
+    scores = {}
+    results = recognize_jobs(ocr, jobs, batch_size, debug_dir=output_dir, cache=cache, workers=workers, digits=digits,
+                             scores=scores, verdicts=verdicts)
+    
+    header_rec_texts = [results.get(key, []) for key in header_keys]
+    body_rec_texts = [[results.get(key, []) for key in keys] for keys in body_keys]
+    header_texts = ['\\n'.join(rec_texts) for rec_texts in header_rec_texts]
+    table_data = [['\\n'.join(rec_texts) for rec_texts in row] for row in body_rec_texts]
+    body_verdicts = [[verdicts.get(key) for key in keys] for keys in body_keys] if classify else None
+    text_scores = collect_scores(scores, results, header_keys, body_keys)
+    return header_texts, header_rec_texts, table_data, body_rec_texts, body_verdicts, text_scores
+
+
+def find_row_strip(input_dir, row_idx):
+    """
+    查找整行识别使用的行图片，优先使用 detect.py --rows 保存在优化图片目录中的行图片，
+    其次使用 --artifacts full 保存的原始行图片
+    
+    Args:
+        input_dir: 输入目录
+        row_idx: 行号
+    
+    Returns:
+        str: 行图片路径，都不存在时为 None
+    """
+    for dirname in ("detection_result_optimized", "detection_result"):
+        path = Path(input_dir) / dirname / f"tbody_row_{row_idx}.png"
+        if path.exists():
+            return str(path)
+    return None
+
+
+def process_table_rows(ocr, input_dir, output_dir, detection_data, batch_size, cache=None, classify=False, workers=1,
+                       digits=False):
+    """
+    整行识别表格主体，表头单元格仍逐个识别
+    
+    Args:
+        ocr: OCR后端实例
+        input_dir: 输入目录，需要包含 detect.py --rows 保存的行图片
+        output_dir: 输出目录
+        detection_data: detection.json 数据
+        batch_size: 每批的行数或单元格数量
+        cache: OCRCache 实例
+        classify: 是否按背景色判定状态单元格的结果
+        workers: 识别进程数
+        digits: 逐个识别的数字列是否使用模板匹配识别
+    
+    Returns:
+        tuple: 同 process_table_batched
+    """
+    header_cells = detection_data.get('header_cells', [])
+    body_rows = [row for row in detection_data.get('body', {}).get('rows', []) if row.get('cells')]
+    row_indices = [i for i, row in enumerate(detection_data.get('body', {}).get('rows', [])) if row.get('cells')]
+    strips = [find_row_strip(input_dir, i) for i in row_indices]
+    if None in strips:
+        raise ValueError(f"行图片不存在: tbody_row_{row_indices[strips.index(None)]}.png，"
+                         f"整行识别需要使用 detect.py --rows 保存的行图片")
+    if classify:
+        # 按背景色判定时每行都要裁剪状态单元格，行图片只读取一次，识别和判定共用
+        strips = [load_rgb(strip) for strip in strips]
+    
+    header_jobs = [(('header', i), -1, str(Path(input_dir) / "detection_result_optimized" / cell['filename']))
+                   for i, cell in enumerate(header_cells)]
+    scores = {}
+    results, verdicts = recognize_table_rows(
+        ocr, header_jobs, strips, header_cells, body_rows,
+        detection_data['table_bounds']['x0'], batch_size, output_dir, cache, classify, workers, digits, scores)
+    
+    header_rec_texts = [results.get(('header', i), []) for i in range(len(header_cells))]
+    body_rec_texts = [[results.get((row_idx, col), []) for col in range(len(row['cells']))]
+                      for row_idx, row in enumerate(body_rows)]
+    header_texts = ['\\n'.join(rec_texts) for rec_texts in header_rec_texts]
+    table_data = [['\\n'.join(rec_texts) for rec_texts in row] for row in body_rec_texts]
+    body_verdicts = [[verdicts.get((row_idx, col)) for col in range(len(row['cells']))]
+                     for row_idx, row in enumerate(body_rows)] if classify else None
+    text_scores = collect_scores(scores, results, [('header', i) for i in range(len(header_cells))],
+                                 [[(row_idx, col) for col in range(len(row['cells']))]
+                                  for row_idx, row in enumerate(body_rows)])
+    return header_texts, header_rec_texts, table_data, body_rec_texts, body_verdicts, text_scores
 
 
 def process_cells(ocr, input_dir, output_dir, cells, cell_type="单元格"):
@@ -76,17 +721,18 @@ def process_cells(ocr, input_dir, output_dir, cells, cell_type="单元格"):
     处理单元格列表的OCR识别
     
     Args:
-        ocr: PaddleOCR实例
+        ocr: OCR后端实例
         input_dir: 输入目录
         output_dir: 输出目录
         cells: 单元格列表
         cell_type: 单元格类型描述（用于日志输出）
     
     Returns:
-        tuple: (识别出的文本列表, 原始rec_texts数组列表)
+        tuple: (识别出的文本列表, 原始rec_texts数组列表, 置信度数组列表)
     """
     texts = []
     rec_texts_list = []
+    scores_list = []
     
     for cell in cells:
         filename = cell.get('filename', '')
@@ -100,15 +746,17 @@ def process_cells(ocr, input_dir, output_dir, cells, cell_type="单元格"):
             print(f"警告: 图片文件不存在: {image_path}")
             texts.append("")
             rec_texts_list.append([])
+            scores_list.append([])
             continue
         
         # 处理单元格图片
-        text, rec_texts = process_cell_image(ocr, image_path, output_dir, filename)
+        text, rec_texts, rec_scores = process_cell_image(ocr, image_path, output_dir, filename)
         texts.append(text)
         rec_texts_list.append(rec_texts)
+        scores_list.append(rec_scores)
         print(f"处理{cell_type} {filename}: {text}")
     
-    return texts, rec_texts_list
+    return texts, rec_texts_list, scores_list
 
 
 def save_to_csv(header_texts, table_data, output_path):
@@ -134,7 +782,7 @@ def save_to_csv(header_texts, table_data, output_path):
     print(f"CSV文件已保存到: {output_path}")
 
 
-def save_to_json(header_rec_texts, body_rec_texts, output_path):
+def save_to_json(header_rec_texts, body_rec_texts, output_path, body_verdicts=None, scores=None):
     """
     保存结果到JSON文件
     
@@ -142,11 +790,17 @@ def save_to_json(header_rec_texts, body_rec_texts, output_path):
         header_rec_texts: 表头rec_texts数组列表
         body_rec_texts: 表格主体rec_texts数组列表（二维数组）
         output_path: 输出JSON文件路径
+        body_verdicts: 状态单元格按颜色判定的结果（二维数组，与 body 对应），提供时保存到 verdicts 字段
+        scores: 每段文本的置信度 {"header", "body"}，结构与 header 和 body 一致，提供时保存到 scores 字段
     """
     result = {
         "header": header_rec_texts,
         "body": body_rec_texts
     }
+    if body_verdicts is not None:
+        result["verdicts"] = body_verdicts
+    if scores is not None:
+        result["scores"] = scores
     
     with open(output_path, 'w', encoding='utf-8') as jsonfile:
         json.dump(result, jsonfile, ensure_ascii=False, indent=2)
@@ -205,9 +859,9 @@ def main():
         print(f"错误: detection.json文件不存在: {detection_json_path}")
         return 1
     
-    # 创建输出目录（如果存在则先删除）
+    # 创建输出目录（如果存在且不继续上次的识别则先删除）
     output_dir = Path(args.output)
-    if output_dir.exists():
+    if output_dir.exists() and not args.resume:
         print(f"删除已存在的输出目录: {output_dir}")
         shutil.rmtree(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -220,28 +874,64 @@ def main():
         print(f"错误: 无法读取detection.json文件: {e}")
         return 1
     
-    # 初始化PaddleOCR
-    print("初始化PaddleOCR...")
-    ocr = init_paddleocr()
+    # 指定 --ocr-server 且服务正在运行时使用服务识别；否则在第一次识别时初始化OCR后端，多进程识别时由各工作进程自行初始化
+    ocr = connect_ocr_server(args.ocr_server, args.backend)
+    if ocr is None and args.ocr_server:
+        print(f"OCR服务 {args.ocr_server} 不可用，使用本地OCR后端: {args.backend}")
+    if ocr is not None:
+        print(f"使用OCR服务: {args.ocr_server}")
+    else:
+        ocr = LazyOCR(args.backend, args.batch_size if args.batch_size > 1 else None)
     
-    # 处理表头
-    print("处理表头单元格...")
     header_cells = detection_data.get('header_cells', [])
-    header_texts, header_rec_texts = process_cells(ocr, input_dir, output_dir, header_cells, "表头单元格")
-    
-    # 处理表格主体
-    print("处理表格主体单元格...")
     body = detection_data.get('body', {})
     body_rows = body.get('rows', [])
-    table_data = []
-    body_rec_texts = []
     
-    for row_idx, row in enumerate(body_rows):
-        cells = row.get('cells', [])
-        row_texts, row_rec_texts = process_cells(ocr, input_dir, output_dir, cells, "主体单元格")
-        if row_texts:  # 只添加非空行
-            table_data.append(row_texts)
-            body_rec_texts.append(row_rec_texts)
+    if args.rows or args.batch_size > 1 or args.workers > 1 or isinstance(ocr, OCRClient):
+        # 识别结果按单元格像素定期保存到检查点，中断后使用 --resume 重新运行时已识别的单元格直接复用
+        cache = OCRCache(args.cache or output_dir / CHECKPOINT_FILENAME, args.cache_tolerance, CHECKPOINT_INTERVAL,
+                         args.backend)
+        try:
+            if args.rows:
+                # 整行识别表格主体
+                print(f"整行识别表格主体，每批 {args.batch_size} 行...")
+                (header_texts, header_rec_texts, table_data, body_rec_texts, body_verdicts,
+                 scores) = process_table_rows(
+                    ocr, input_dir, output_dir, detection_data, args.batch_size, cache, not args.no_verdict,
+                    args.workers, args.digits)
+            else:
+                # 批量识别所有单元格
+                print(f"批量识别单元格，每批 {args.batch_size} 个...")
+                (header_texts, header_rec_texts, table_data, body_rec_texts, body_verdicts,
+                 scores) = process_table_batched(
+                    ocr, input_dir, output_dir, header_cells, body_rows, args.batch_size, cache, not args.no_verdict,
+                    args.workers, args.digits)
+        except ValueError as e:
+            print(f"错误: {e}")
+            return 1
+        finally:
+            cache.save()
+    else:
+        body_verdicts = None
+        
+        # 处理表头
+        print("处理表头单元格...")
+        header_texts, header_rec_texts, header_scores = process_cells(ocr, input_dir, output_dir, header_cells,
+                                                                      "表头单元格")
+        scores = {"header": header_scores, "body": []}
+        
+        # 处理表格主体
+        print("处理表格主体单元格...")
+        table_data = []
+        body_rec_texts = []
+        
+        for row_idx, row in enumerate(body_rows):
+            cells = row.get('cells', [])
+            row_texts, row_rec_texts, row_scores = process_cells(ocr, input_dir, output_dir, cells, "主体单元格")
+            if row_texts:  # 只添加非空行
+                table_data.append(row_texts)
+                body_rec_texts.append(row_rec_texts)
+                scores["body"].append(row_scores)
     
     # 保存CSV结果
     csv_output_path = output_dir / "result.csv"
@@ -249,7 +939,7 @@ def main():
     
     # 保存JSON结果
     json_output_path = output_dir / "result.json"
-    save_to_json(header_rec_texts, body_rec_texts, json_output_path)
+    save_to_json(header_rec_texts, body_rec_texts, json_output_path, body_verdicts, scores)
     
     # 计算统计信息
     total_cells = len(header_cells) + sum(len(row.get('cells', [])) for row in body_rows)
@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import os
 import json
-import numpy as np
-import cv2
 from pathlib import Path
 import time
+from concurrent.futures import ThreadPoolExecutor
+from lazy import lazy_import
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# save_detection_results 可选的图片保存级别
+ARTIFACT_LEVELS = ('none', 'optimized', 'full')
 
 def is_gray_or_black(pixel, threshold=20):
     """
@@ -31,6 +37,28 @@ def is_white(pixel, threshold=240):
     r, g, b = pixel
     return r >= threshold and g >= threshold and b >= threshold
 
+def gray_or_black_mask(img, threshold=20):
+    """
+    逐像素判断是否接近纯灰或纯黑（is_gray_or_black 的数组版本）
+    :param img: RGB像素数组，形状为 (..., 3)
+    :param threshold: 允许的RGB通道差异阈值
+    :return: bool 数组，形状为 img.shape[:-1]
+    """
+    r, g, b = img[..., 0], img[..., 1], img[..., 2]
+    # 与 is_gray_or_black 一致，通道差直接在 uint8 上计算
+    is_gray = (r < 235) & (g < 235) & (b < 235) & (np.abs(r - g) < threshold) & (np.abs(g - b) < threshold) & (np.abs(r - b) < threshold)
+    is_dark = (r < 70) & (g < 70) & (b < 70)
+    return is_gray | is_dark
+
+def white_mask(img, threshold=240):
+    """
+    逐像素判断是否接近纯白（is_white 的数组版本）
+    :param img: RGB像素数组，形状为 (..., 3)
+    :param threshold: 白色的阈值
+    :return: bool 数组，形状为 img.shape[:-1]
+    """
+    return (img[..., 0] >= threshold) & (img[..., 1] >= threshold) & (img[..., 2] >= threshold)
+
 def is_white_line(pixels, threshold=0.95):
     """
     判断一行/列像素是否都是白色
@@ -38,8 +66,7 @@ def is_white_line(pixels, threshold=0.95):
     :param threshold: 判断为白色的像素比例阈值
     :return: bool
     """
-    white_pixels = np.array([is_white(pixel) for pixel in pixels])
-    return np.mean(white_pixels) > threshold
+    return np.mean(white_mask(pixels)) > threshold
 
 def is_separator_line(pixels, threshold=0.8):
     """
@@ -48,9 +75,7 @@ def is_separator_line(pixels, threshold=0.8):
     :param threshold: 判断为分隔线的像素比例阈值
     :return: bool
     """
-    # 统计每个像素是否为灰色或黑色
-    gray_or_black_pixels = np.array([is_gray_or_black(pixel) for pixel in pixels])
-    return np.mean(gray_or_black_pixels) > threshold
+    return np.mean(gray_or_black_mask(pixels)) > threshold
 
 def is_white_region(pixels, threshold=0.9):
     """
@@ -59,8 +84,18 @@ def is_white_region(pixels, threshold=0.9):
     :param threshold: 判断为白色的像素比例阈值
     :return: bool
     """
-    white_pixels = np.array([is_white(pixel) for pixel in pixels])
-    return np.mean(white_pixels) > threshold
+    return np.mean(white_mask(pixels)) > threshold
+
+def trim_white_lines(white_lines):
+    """
+    从两端跳过白色的行/列，与逐行扫描的结果一致
+    :param white_lines: 每行/列是否为白色的 bool 数组
+    :return: (start, end) 非白色部分的范围，end 不包含
+    """
+    non_white = np.flatnonzero(~white_lines)
+    if len(non_white) == 0:
+        return len(white_lines), len(white_lines)
+    return int(non_white[0]), int(non_white[-1]) + 1
 
 def merge_continuous_ranges(separator_lines):
     """
@@ -86,75 +121,212 @@ def merge_continuous_ranges(separator_lines):
     ranges.append((start, prev))
     return ranges
 
-def find_table_bounds(img):
+def find_separator_lines(region, axis, white=None, threshold=0.8):
+    """
+    检测区域内的分隔线
+    :param region: RGB图像区域
+    :param axis: 1 检测水平分隔线（按行统计），0 检测垂直分隔线（按列统计）
+    :param white: 区域对应的白色像素 mask，提供时使用粗筛-精修模式
+    :param threshold: 判断为分隔线的像素比例阈值
+    :return: 分隔线所在的行号/列号数组（相对区域）
+    """
+    if white is None:
+        ratios = gray_or_black_mask(region).mean(axis=axis)
+        return np.flatnonzero(ratios > threshold)
+    
+    # 粗筛：灰色或黑色像素一定不是白色，非白色像素比例不超过阈值的行/列不可能是分隔线，
+    # 用白色像素的投影剖面筛出候选行/列，只对候选在原分辨率下计算灰黑比例，结果与全量扫描一致
+    n = region.shape[axis]
+    if n == 0:
+        return np.flatnonzero(np.zeros(region.shape[1 - axis], dtype=bool))
+    non_white_ratios = (n - np.count_nonzero(white, axis=axis)) / n
+    candidates = np.flatnonzero(non_white_ratios > threshold)
+    
+    # 精修
+    lines = np.take(region, candidates, axis=1 - axis)
+    ratios = gray_or_black_mask(lines).mean(axis=axis)
+    return candidates[ratios > threshold]
+
+def find_table_bounds(img, white=None):
     """
     找到表格的实际有效范围
     :param img: RGB图像
+    :param white: 图像对应的白色像素 mask，不提供时重新计算
     :return: (x0, y0, x1, y1) 表格的有效范围
     """
     print("正在检测表格边界...")
     height, width = img.shape[:2]
     print(f"图片尺寸: {width} x {height}")
     
-    # 从上往下扫描
-    y0 = 0
-    while y0 < height and is_white_line(img[y0:y0+1, :].reshape(-1, 3)):
-        y0 += 1
-    
-    # 从下往上扫描
-    y1 = height - 1
-    while y1 > y0 and is_white_line(img[y1:y1+1, :].reshape(-1, 3)):
-        y1 -= 1
-    y1 += 1  # 包含最后一行
+    # 一次计算每行、每列的白色像素比例
+    if white is None:
+        white = white_mask(img)
+    y0, y1 = trim_white_lines(white.mean(axis=1) > 0.95)
+    x0, x1 = trim_white_lines(white.mean(axis=0) > 0.95)
     
-    # 从左往右扫描
-    x0 = 0
-    while x0 < width and is_white_line(img[:, x0:x0+1].reshape(-1, 3)):
-        x0 += 1
+    print(f"表格边界检测完成: ({x0}, {y0}) -> ({x1}, {y1})")
+    return x0, y0, x1, y1
+
+def load_image(image):
+    """
+    读取RGB图像
+    :param image: 图片路径、.npy 文件路径（RGB，以 mmap 方式打开，不整体读入内存）或RGB图像数组
+    :return: RGB图像数组
+    """
+    if isinstance(image, np.ndarray):
+        return image
+    if str(image).endswith('.npy'):
+        img = np.load(image, mmap_mode='r')
+        if img.ndim != 3 or img.shape[2] != 3 or img.dtype != np.uint8:
+            raise ValueError(f"不支持的图像数组: {image}, 形状 {img.shape}, 类型 {img.dtype}")
+        return img
+    img = cv2.imread(str(image))
+    if img is None:
+        raise ValueError(f"无法读取图片: {image}")
+    # 转换为RGB（OpenCV默认是BGR），原地转换避免再复制一份整图
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    计算文件内容的 SHA-1
+    :param path: 文件路径
+    :return: 十六进制字符串
+    """
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_cached_detection(output_dir, image_hash, artifacts, rows=False):
+    """
+    读取输出目录中已有的检测结果，用于跳过输入未变化的检测
+    :param output_dir: 输出目录
+    :param image_hash: 输入图片的内容哈希
+    :param artifacts: 需要的图片保存级别
+    :param rows: 是否需要整行识别使用的行图片
+    :return: 检测结果，图片内容、图片保存级别或是否保存行图片不一致时为 None
+    """
+    detection_path = Path(output_dir) / 'detection.json'
+    if not detection_path.exists():
+        return None
+    try:
+        with open(detection_path, 'r', encoding='utf-8') as f:
+            regions = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # detection.json 在所有图片写入完成后才保存，存在即说明上次保存完整
+    source = regions.get('source', {})
+    if source.get('sha1') != image_hash or source.get('artifacts') != artifacts or source.get('rows', False) != rows:
+        return None
+    return regions
+
+def strip_ranges(start, end, strip_height):
+    """
+    按固定高度将 [start, end) 切分为水平条带
+    :return: 生成 (s, e) 条带范围，e 不包含
+    """
+    for s in range(start, end, strip_height):
+        yield s, min(s + strip_height, end)
+
+def find_table_bounds_tiled(img, strip_height):
+    """
+    分块找到表格的实际有效范围，结果与 find_table_bounds 一致
+    :param img: RGB图像
+    :param strip_height: 每个条带的高度
+    :return: (x0, y0, x1, y1) 表格的有效范围
+    """
+    print("正在分块检测表格边界...")
+    height, width = img.shape[:2]
+    print(f"图片尺寸: {width} x {height}")
     
-    # 从右往左扫描
-    x1 = width - 1
-    while x1 > x0 and is_white_line(img[:, x1:x1+1].reshape(-1, 3)):
-        x1 -= 1
-    x1 += 1  # 包含最后一列
+    # 行的白色比例只与本行有关，直接按条带计算；列的白色像素数跨条带累加
+    row_white = np.zeros(height, dtype=bool)
+    col_white_counts = np.zeros(width, dtype=np.int64)
+    for s, e in strip_ranges(0, height, strip_height):
+        white = white_mask(img[s:e])
+        row_white[s:e] = white.mean(axis=1) > 0.95
+        col_white_counts += np.count_nonzero(white, axis=0)
+    y0, y1 = trim_white_lines(row_white)
+    x0, x1 = trim_white_lines(col_white_counts / height > 0.95)
     
     print(f"表格边界检测完成: ({x0}, {y0}) -> ({x1}, {y1})")
     return x0, y0, x1, y1
 
-def detect_table_regions(image_path, no_header=False):
+def find_horizontal_separators_tiled(img, x0, y0, x1, y1, strip_height, coarse=True):
+    """
+    分块检测水平分隔线，跨条带边界的分隔线由 merge_continuous_ranges 按全局行号拼接
+    :return: (分隔线行号列表, 表格范围内每行的白色像素数)
+    """
+    separator_lines = []
+    row_white_counts = np.zeros(y1 - y0, dtype=np.int64)
+    for s, e in strip_ranges(y0, y1, strip_height):
+        region = img[s:e, x0:x1]
+        white = white_mask(region)
+        row_white_counts[s - y0:e - y0] = np.count_nonzero(white, axis=1)
+        lines = find_separator_lines(region, 1, white if coarse else None)
+        separator_lines.extend((lines + s).tolist())
+    return separator_lines, row_white_counts
+
+def find_vertical_separators_tiled(img, x0, y0, x1, y1, strip_height, coarse=True, threshold=0.8):
+    """
+    分块检测垂直分隔线，每列的像素数跨条带累加
+    :return: 分隔线列号列表
+    """
+    n = y1 - y0
+    if n <= 0:
+        return []
+    
+    # 粗筛：累加每列的非白色像素数，筛出候选列
+    candidates = np.arange(x1 - x0)
+    if coarse:
+        non_white_counts = np.zeros(x1 - x0, dtype=np.int64)
+        for s, e in strip_ranges(y0, y1, strip_height):
+            non_white_counts += (e - s) - np.count_nonzero(white_mask(img[s:e, x0:x1]), axis=0)
+        candidates = np.flatnonzero(non_white_counts / n > threshold)
+    
+    # 精修：只在候选列上累加灰色或黑色像素数
+    gray_counts = np.zeros(len(candidates), dtype=np.int64)
+    for s, e in strip_ranges(y0, y1, strip_height):
+        gray_counts += np.count_nonzero(gray_or_black_mask(np.take(img[s:e, x0:x1], candidates, axis=1)), axis=0)
+    return (candidates[gray_counts / n > threshold] + x0).tolist()
+
+def detect_table_regions(image_path, no_header=False, coarse=True, strip_height=None):
     """
     检测表格区域
-    :param image_path: 图片路径
+    :param image_path: 图片路径、.npy 文件路径或RGB图像数组
     :param no_header: 是否没有表头
+    :param coarse: 是否使用粗筛-精修模式检测分隔线，结果与全量扫描一致
+    :param strip_height: 分块处理时每个条带的高度，不提供时整图处理
     :return: dict 包含检测到的区域信息
     """
     if no_header:
         raise ValueError("暂不支持无表头的情况")
     
-    print(f"开始处理图片: {image_path}")
+    if isinstance(image_path, np.ndarray):
+        print(f"开始处理图片: {image_path.shape[1]} x {image_path.shape[0]} 图像数组")
+    else:
+        print(f"开始处理图片: {image_path}")
     
     # 读取图片
     print("正在读取图片...")
-    img = cv2.imread(image_path)
-    if img is None:
-        raise ValueError(f"无法读取图片: {image_path}")
-    
-    # 转换为RGB（OpenCV默认是BGR）
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    
-    # 找到表格的实际有效范围
-    x0, y0, x1, y1 = find_table_bounds(img)
-    
-    # 检测水平分隔线
-    print("正在检测水平分隔线...")
-    separator_lines = []
-    total_rows = y1 - y0
-    for i, y in enumerate(range(y0, y1)):
-        if i % 100 == 0:  # 每100行显示一次进度
-            print(f"  进度: {i}/{total_rows} ({i/total_rows*100:.1f}%)")
-        line = img[y:y+1, x0:x1].reshape(-1, 3)
-        if is_separator_line(line):
-            separator_lines.append(y)
+    img = load_image(image_path)
+    
+    if strip_height:
+        # 分块模式：按条带计算 mask，内存占用只与条带大小有关
+        print(f"分块处理: 每块 {strip_height} 行")
+        x0, y0, x1, y1 = find_table_bounds_tiled(img, strip_height)
+        print("正在检测水平分隔线...")
+        separator_lines, row_white_counts = find_horizontal_separators_tiled(img, x0, y0, x1, y1, strip_height, coarse)
+    else:
+        # 找到表格的实际有效范围
+        white = white_mask(img)
+        x0, y0, x1, y1 = find_table_bounds(img, white)
+        
+        # 检测水平分隔线
+        print("正在检测水平分隔线...")
+        table_white = white[y0:y1, x0:x1] if coarse else None
+        separator_lines = (find_separator_lines(img[y0:y1, x0:x1], 1, table_white) + y0).tolist()
     
     print(f"检测到 {len(separator_lines)} 条水平分隔线")
     
@@ -170,7 +342,13 @@ def detect_table_regions(image_path, no_header=False):
     if horizontal_separators:
         first_sep_start, first_sep_end = horizontal_separators[0]
         # 检查分隔线上方是否为白色区域
-        if is_white_region(img[y0:first_sep_start, x0:x1].reshape(-1, 3)):
+        if strip_height:
+            above = row_white_counts[:first_sep_start - y0]
+            above_size = above.size * (x1 - x0)
+            above_white = above_size > 0 and above.sum() / above_size > 0.9
+        else:
+            above_white = is_white_region(img[y0:first_sep_start, x0:x1].reshape(-1, 3))
+        if above_white:
             header_y0 = first_sep_end + 1
         else:
             header_y1 = first_sep_start
@@ -179,14 +357,11 @@ def detect_table_regions(image_path, no_header=False):
     
     # 在表头区域内检测垂直分隔线
     print("正在检测垂直分隔线...")
-    vertical_separator_lines = []
-    total_cols = x1 - x0
-    for i, x in enumerate(range(x0, x1)):
-        if i % 50 == 0:  # 每50列显示一次进度
-            print(f"  进度: {i}/{total_cols} ({i/total_cols*100:.1f}%)")
-        line = img[header_y0:header_y1, x:x+1].reshape(-1, 3)
-        if is_separator_line(line):
-            vertical_separator_lines.append(x)
+    if strip_height:
+        vertical_separator_lines = find_vertical_separators_tiled(img, x0, header_y0, x1, header_y1, strip_height, coarse)
+    else:
+        header_white = white[header_y0:header_y1, x0:x1] if coarse else None
+        vertical_separator_lines = (find_separator_lines(img[header_y0:header_y1, x0:x1], 0, header_white) + x0).tolist()
     
     print(f"检测到 {len(vertical_separator_lines)} 条垂直分隔线")
     
@@ -405,30 +580,10 @@ def optimize_cell_image(img, cell_bounds, white_threshold=0.95):
             'y1': cell_bounds['y1']
         }
     
-    # 否则进行白边裁切
-    height, width = cell_img.shape[:2]
-    
-    # 从上往下扫描，找到第一个非白色行
-    top = 0
-    while top < height and is_white_line(cell_img[top:top+1, :].reshape(-1, 3)):
-        top += 1
-    
-    # 从下往上扫描，找到第一个非白色行
-    bottom = height - 1
-    while bottom > top and is_white_line(cell_img[bottom:bottom+1, :].reshape(-1, 3)):
-        bottom -= 1
-    bottom += 1  # 包含最后一行
-    
-    # 从左往右扫描，找到第一个非白色列
-    left = 0
-    while left < width and is_white_line(cell_img[:, left:left+1].reshape(-1, 3)):
-        left += 1
-    
-    # 从右往左扫描，找到第一个非白色列
-    right = width - 1
-    while right > left and is_white_line(cell_img[:, right:right+1].reshape(-1, 3)):
-        right -= 1
-    right += 1  # 包含最后一列
+    # 否则进行白边裁切，一次计算每行、每列的白色像素比例，找到非白色部分的范围
+    white = white_mask(cell_img)
+    top, bottom = trim_white_lines(white.mean(axis=1) > 0.95)
+    left, right = trim_white_lines(white.mean(axis=0) > 0.95)
     
     # 裁切后的图片
     optimized_img = cell_img[top:bottom, left:right]
@@ -443,14 +598,32 @@ def optimize_cell_image(img, cell_bounds, white_threshold=0.95):
     
     return optimized_img, optimized_bounds
 
-def save_detection_results(image_path, regions, output_dir):
+def save_png(path, img):
+    """
+    保存RGB图片（无压缩PNG），cv2.imwrite 失败时只返回 False，这里转换为异常
+    :param path: 保存路径
+    :param img: RGB图像
+    """
+    if not cv2.imwrite(str(path), cv2.cvtColor(img, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_PNG_COMPRESSION, 0]):
+        raise ValueError(f"无法保存图片: {path}")
+
+def save_detection_results(image_path, regions, output_dir, artifacts='optimized', workers=None, rows=False):
     """
     保存检测结果和裁剪的图片
-    :param image_path: 原始图片路径
+    :param image_path: 原始图片路径、.npy 文件路径或已读取的RGB图像数组
     :param regions: 检测到的区域信息
     :param output_dir: 输出目录
+    :param artifacts: 保存的图片级别，none 只保存 detection.json，optimized 只保存优化后的单元格图片（convert.py 和 srk.py 使用），full 额外保存原始的行、单元格等调试图片
+    :param workers: 写图片的线程数，不提供时使用 ThreadPoolExecutor 的默认值
+    :param rows: 是否在优化图片目录中保存整行识别（convert.py --rows）使用的行图片，artifacts 为 none 时不保存
     """
-    print(f"正在保存检测结果到: {output_dir}")
+    if artifacts not in ARTIFACT_LEVELS:
+        raise ValueError(f"不支持的图片保存级别: {artifacts}，可选值: {', '.join(ARTIFACT_LEVELS)}")
+    save_raw = artifacts == 'full'
+    save_optimized = artifacts != 'none'
+    save_rows = rows and save_optimized
+    
+    print(f"正在保存检测结果到: {output_dir}（图片保存级别: {artifacts}）")
     
     # 删除旧的输出目录（如果存在）
     output_path = Path(output_dir)
@@ -461,77 +634,99 @@ def save_detection_results(image_path, regions, output_dir):
     # 创建输出目录
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # 读取原始图片
-    img = cv2.imread(image_path)
+    # 读取原始图片，传入已读取的图像数组时直接复用；.npy 以 mmap 方式打开，只读取裁剪到的部分
+    img = load_image(image_path)
     
     # 创建检测结果目录
     detection_dir = output_path / 'detection_result'
-    detection_dir.mkdir(parents=True, exist_ok=True)
+    if save_raw:
+        detection_dir.mkdir(parents=True, exist_ok=True)
     
     # 创建优化后的检测结果目录
     optimized_dir = output_path / 'detection_result_optimized'
-    optimized_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 保存表格有效范围
-    print("保存表格边界图片...")
-    bounds = regions['table_bounds']
-    table_img = img[bounds['y0']:bounds['y1'], bounds['x0']:bounds['x1']]
-    cv2.imwrite(str(detection_dir / 'table_bounds.png'), table_img, [cv2.IMWRITE_PNG_COMPRESSION, 0])
-    
-    # 保存表头区域
-    print("保存表头区域图片...")
-    header = regions['header']
-    header_img = img[header['y0']:header['y1'], bounds['x0']:bounds['x1']]
-    cv2.imwrite(str(detection_dir / 'header.png'), header_img, [cv2.IMWRITE_PNG_COMPRESSION, 0])
-    
-    # 保存表头单元格（使用新的命名规则）
-    print("保存表头单元格...")
-    for i, cell in enumerate(regions['header_cells']):
-        # 保存原始单元格
-        cell_img = img[cell['y0']:cell['y1'], cell['x0']:cell['x1']]
-        cv2.imwrite(str(detection_dir / f'thead_cell_{i}.png'), cell_img, [cv2.IMWRITE_PNG_COMPRESSION, 0])
-        
-        # 优化并保存单元格
-        optimized_img, optimized_bounds = optimize_cell_image(img, cell)
-        filename = f'thead_cell_{i}.png'
-        cv2.imwrite(str(optimized_dir / filename), optimized_img, [cv2.IMWRITE_PNG_COMPRESSION, 0])
+    if save_optimized:
+        optimized_dir.mkdir(parents=True, exist_ok=True)
+    
+    # PNG 编码和写文件交给线程池，cv2 编码时会释放 GIL
+    futures = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def write(path, image):
+            futures.append(executor.submit(save_png, path, image))
         
-        # 添加文件名到单元格信息
-        cell['filename'] = filename
-        cell['optimized_bounds'] = optimized_bounds
-    
-    print(f"表头单元格保存完成: {len(regions['header_cells'])} 个")
-    
-    # 保存body行和单元格
-    if 'body' in regions and 'rows' in regions['body']:
-        print("保存表格主体...")
-        total_rows = len(regions['body']['rows'])
-        total_cells = sum(len(row['cells']) for row in regions['body']['rows'])
+        bounds = regions['table_bounds']
+        if save_raw:
+            # 保存表格有效范围
+            print("保存表格边界图片...")
+            table_img = img[bounds['y0']:bounds['y1'], bounds['x0']:bounds['x1']]
+            write(detection_dir / 'table_bounds.png', table_img)
+            
+            # 保存表头区域
+            print("保存表头区域图片...")
+            header = regions['header']
+            header_img = img[header['y0']:header['y1'], bounds['x0']:bounds['x1']]
+            write(detection_dir / 'header.png', header_img)
         
-        for row_idx, row in enumerate(regions['body']['rows']):
-            if row_idx % 10 == 0:  # 每10行显示一次进度
-                print(f"  处理行: {row_idx + 1}/{total_rows}")
+        # 保存表头单元格（使用新的命名规则）
+        print("保存表头单元格...")
+        for i, cell in enumerate(regions['header_cells']):
+            # 保存原始单元格
+            if save_raw:
+                cell_img = img[cell['y0']:cell['y1'], cell['x0']:cell['x1']]
+                write(detection_dir / f'thead_cell_{i}.png', cell_img)
             
-            # 保存行图片
-            row_img = img[row['y0']:row['y1'], bounds['x0']:bounds['x1']]
-            cv2.imwrite(str(detection_dir / f'tbody_row_{row_idx}.png'), row_img, [cv2.IMWRITE_PNG_COMPRESSION, 0])
+            # 优化并保存单元格
+            optimized_img, optimized_bounds = optimize_cell_image(img, cell)
+            filename = f'thead_cell_{i}.png'
+            if save_optimized:
+                write(optimized_dir / filename, optimized_img)
             
-            # 保存行中的每个单元格
-            for cell in row['cells']:
-                # 保存原始单元格
-                cell_img = img[cell['y0']:cell['y1'], cell['x0']:cell['x1']]
-                cv2.imwrite(str(detection_dir / f'tbody_cell_{cell["row"]}_{cell["col"]}.png'), cell_img, [cv2.IMWRITE_PNG_COMPRESSION, 0])
+            # 添加文件名到单元格信息
+            cell['filename'] = filename
+            cell['optimized_bounds'] = optimized_bounds
+        
+        print(f"表头单元格保存完成: {len(regions['header_cells'])} 个")
+        
+        # 保存body行和单元格
+        if 'body' in regions and 'rows' in regions['body']:
+            print("保存表格主体...")
+            total_rows = len(regions['body']['rows'])
+            total_cells = sum(len(row['cells']) for row in regions['body']['rows'])
+            
+            for row_idx, row in enumerate(regions['body']['rows']):
+                if row_idx % 10 == 0:  # 每10行显示一次进度
+                    print(f"  处理行: {row_idx + 1}/{total_rows}")
                 
-                # 优化并保存单元格
-                optimized_img, optimized_bounds = optimize_cell_image(img, cell)
-                filename = f'tbody_cell_{cell["row"]}_{cell["col"]}.png'
-                cv2.imwrite(str(optimized_dir / filename), optimized_img, [cv2.IMWRITE_PNG_COMPRESSION, 0])
+                # 保存行图片
+                row_img = img[row['y0']:row['y1'], bounds['x0']:bounds['x1']]
+                if save_raw:
+                    write(detection_dir / f'tbody_row_{row_idx}.png', row_img)
+                if save_rows and row['cells']:
+                    write(optimized_dir / f'tbody_row_{row_idx}.png', row_img)
                 
-                # 添加文件名到单元格信息
-                cell['filename'] = filename
-                cell['optimized_bounds'] = optimized_bounds
+                # 保存行中的每个单元格
+                for cell in row['cells']:
+                    # 保存原始单元格
+                    if save_raw:
+                        cell_img = img[cell['y0']:cell['y1'], cell['x0']:cell['x1']]
+                        write(detection_dir / f'tbody_cell_{cell["row"]}_{cell["col"]}.png', cell_img)
+                    
+                    # 优化并保存单元格
+                    optimized_img, optimized_bounds = optimize_cell_image(img, cell)
+                    filename = f'tbody_cell_{cell["row"]}_{cell["col"]}.png'
+                    if save_optimized:
+                        write(optimized_dir / filename, optimized_img)
+                    
+                    # 添加文件名到单元格信息
+                    cell['filename'] = filename
+                    cell['optimized_bounds'] = optimized_bounds
+            
+            print(f"表格主体保存完成: {total_rows} 行, {total_cells} 个单元格")
         
-        print(f"表格主体保存完成: {total_rows} 行, {total_cells} 个单元格")
+        print(f"等待 {len(futures)} 张图片写入完成...")
+    
+    # 写入失败时抛出对应的异常
+    for future in futures:
+        future.result()
     
     # 保存检测结果
     print("保存检测结果JSON文件...")
@@ -558,6 +753,44 @@ def parse_args():
         help='指定表格是否没有表头，默认为False'
     )
     
+    parser.add_argument(
+        '--full-scan',
+        action='store_true',
+        help='关闭分隔线的粗筛-精修模式，对每一行/列做全量扫描'
+    )
+    
+    parser.add_argument(
+        '--strip-height',
+        type=int,
+        default=0,
+        help='分块处理时每个条带的高度（像素），0 表示整图处理；配合 .npy 输入时内存占用与图片高度无关'
+    )
+    
+    parser.add_argument(
+        '--artifacts',
+        choices=ARTIFACT_LEVELS,
+        default='optimized',
+        help='保存的图片级别：none 只保存 detection.json，optimized 只保存后续步骤使用的优化单元格图片，full 额外保存原始的行和单元格调试图片'
+    )
+    
+    parser.add_argument(
+        '--rows',
+        action='store_true',
+        help='在优化图片目录中保存 convert.py --rows 整行识别使用的行图片'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='写图片的线程数，默认由线程池自动决定'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='忽略输出目录中已有的检测结果，重新检测'
+    )
+    
     parser.add_argument(
         '-o', '--output',
         type=str,
@@ -585,13 +818,21 @@ def main():
     print("表格检测处理开始")
     print("=" * 50)
     
-    # 检测表格区域
-    print("\n步骤 1/2: 检测表格区域")
-    regions = detect_table_regions(args.image_path, args.no_header)
-    
-    # 保存检测结果
-    print("\n步骤 2/2: 保存检测结果")
-    save_detection_results(args.image_path, regions, args.output)
+    # 输出目录中已有同一张图片、同一图片保存级别的检测结果时直接复用
+    image_hash = file_hash(args.image_path)
+    regions = None if args.force else load_cached_detection(args.output, image_hash, args.artifacts, args.rows)
+    if regions is not None:
+        print(f"\n图片内容未变化，跳过检测，复用 {args.output} 中已有的检测结果（使用 --force 重新检测）")
+    else:
+        # 检测表格区域
+        print("\n步骤 1/2: 检测表格区域")
+        img = load_image(args.image_path)
+        regions = detect_table_regions(img, args.no_header, not args.full_scan, args.strip_height)
+        regions['source'] = {'sha1': image_hash, 'artifacts': args.artifacts, 'rows': args.rows}
+        
+        # 保存检测结果，复用已读取的图片
+        print("\n步骤 2/2: 保存检测结果")
+        save_detection_results(img, regions, args.output, args.artifacts, args.workers, args.rows)
     
     print("\n" + "=" * 50)
     print(f"处理完成！检测结果已保存到 {args.output} 目录")
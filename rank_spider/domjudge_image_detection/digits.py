@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+import re
+from lazy import lazy_import
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# 数字列（分数、罚时、通过时间和尝试次数）中每一行允许的内容
+NUMERIC_LINE_PATTERN = re.compile(r'^\d+( ?tr(y|ies))?$')
+
+# 分数列的索引，分数列及之后的题目状态列都只包含数字和 try/tries
+SCORE_COL = 1
+
+# 必须全部学习到的字符，缺少任何一个数字时未学习的数字会被误认为形状相近的数字（如 8 识别为 5）
+DIGIT_CHARS = '0123456789'
+
+
+class DigitRecognizer:
+    """
+    数字列的模板匹配识别器
+
+    DOMjudge 榜单的数字列使用固定字体，从少量经 OCR 识别的单元格中切分出字形作为模板，
+    之后的单元格按连通域切分字形，与所有模板一起向量化比较，全部字形都能可靠匹配时才返回结果，
+    否则返回 None 交给 OCR 识别。10 个数字没有全部学习到时不做匹配
+    """
+
+    def __init__(self, size=(20, 14), max_distance=0.2, max_ratio=0.7, max_samples=8, space_ratio=0.3):
+        """
+        :param size: 字形归一化后的 (高, 宽)
+        :param max_distance: 字形与模板的最大平均差异，超过时认为无法识别
+        :param max_ratio: 最近模板的差异与最近的其他字符模板的差异之比的上限，超过时认为两个字符难以区分
+        :param max_samples: 每个字符最多保留的模板数量
+        :param space_ratio: 数字与 try/tries 之间的间距超过行高的该比例时视为空格
+        """
+        self.size = size
+        self.max_distance = max_distance
+        self.max_ratio = max_ratio
+        self.max_samples = max_samples
+        self.space_ratio = space_ratio
+        self.samples = {}
+        self._chars = None
+        self._templates = None
+        self._aspects = None
+
+    def foreground(self, img):
+        """
+        二值化单元格图像，文字为 True
+        :param img: BGR图像
+        :return: bool 数组，图像没有明显对比度时为 None
+        """
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        if gray.size == 0 or int(gray.max()) - int(gray.min()) < 60:
+            return None
+        _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        fg = binary.astype(bool)
+        # 文字像素总是少数，深色背景浅色文字时反转
+        if fg.mean() > 0.5:
+            fg = ~fg
+        return fg
+
+    def normalize(self, crop):
+        """
+        将字形缩放到固定高度并水平居中，保持宽高比，避免 1 这样的细字形被拉伸
+        :param crop: 字形外接矩形内的前景图
+        :return: 形状为 size 的 float32 数组
+        """
+        height, width = self.size
+        new_width = min(width, max(1, round(crop.shape[1] * height / crop.shape[0])))
+        glyph = np.zeros(self.size, dtype=np.float32)
+        left = (width - new_width) // 2
+        glyph[:, left:left + new_width] = cv2.resize(crop, (new_width, height), interpolation=cv2.INTER_AREA)
+        return glyph
+
+    def glyph_lines(self, img):
+        """
+        将单元格切分为文本行和字形
+        :param img: BGR图像
+        :return: [(行高, [(x0, x1, 归一化字形, 宽高比)])]，空白单元格为 []，无法切分时为 None
+        """
+        fg = self.foreground(img)
+        if fg is None:
+            return [] if img.size and int(img.min()) >= 240 else None
+
+        # 按行投影切分文本行
+        rows = np.flatnonzero(fg.any(axis=1))
+        if len(rows) == 0:
+            return []
+        breaks = np.flatnonzero(np.diff(rows) > 1)
+        starts = np.concatenate([[rows[0]], rows[breaks + 1]])
+        ends = np.concatenate([rows[breaks], [rows[-1]]]) + 1
+
+        lines = []
+        for y0, y1 in zip(starts, ends):
+            line = fg[y0:y1]
+            count, _, stats, _ = cv2.connectedComponentsWithStats(line.astype(np.uint8), connectivity=8)
+            # 合并横向重叠的连通域（如 i 的点和竖）
+            spans = sorted((x, x + w) for x, _, w, _, _ in stats[1:count])
+            merged = []
+            for x0, x1 in spans:
+                if merged and x0 < merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], x1)
+                else:
+                    merged.append([x0, x1])
+            height = y1 - y0
+            glyphs = []
+            for x0, x1 in merged:
+                # 按字形自身的外接矩形裁剪，不受同一行中其他字形（如 y 的下伸部分）影响
+                glyph_rows = np.flatnonzero(line[:, x0:x1].any(axis=1))
+                crop = line[glyph_rows[0]:glyph_rows[-1] + 1, x0:x1].astype(np.float32)
+                glyphs.append((x0, x1, self.normalize(crop), crop.shape[1] / crop.shape[0]))
+            lines.append((height, glyphs))
+        return lines
+
+    def learn(self, img, rec_texts):
+        """
+        从已识别的单元格中学习字形模板，字形数与识别文本的字符数一致时才使用
+        :param img: BGR图像
+        :param rec_texts: OCR识别出的rec_texts数组
+        :return: 是否学习成功
+        """
+        if not rec_texts or not all(NUMERIC_LINE_PATTERN.match(text) for text in rec_texts):
+            return False
+        lines = self.glyph_lines(img)
+        if not lines or len(lines) != len(rec_texts):
+            return False
+        pairs = []
+        for (_, glyphs), text in zip(lines, rec_texts):
+            chars = text.replace(' ', '')
+            if len(glyphs) != len(chars):
+                return False
+            pairs.extend(zip(chars, glyphs))
+        for char, (_, _, glyph, aspect) in pairs:
+            samples = self.samples.setdefault(char, [])
+            if len(samples) < self.max_samples:
+                samples.append((glyph, aspect))
+        self._templates = None
+        return True
+
+    def is_complete(self):
+        """是否已学习到全部 10 个数字"""
+        return all(char in self.samples for char in DIGIT_CHARS)
+
+    def recognize(self, img):
+        """
+        识别数字列单元格
+        :param img: BGR图像
+        :return: rec_texts 数组，无法可靠识别时为 None
+        """
+        result = self.recognize_with_scores(img)
+        return result[0] if result is not None else None
+
+    def recognize_with_scores(self, img):
+        """
+        识别数字列单元格，同时返回每行的置信度
+        :param img: BGR图像
+        :return: (rec_texts 数组, 置信度数组)，置信度为 1 减去该行字形与模板的最大差异；无法可靠识别时为 None
+        """
+        if not self.is_complete():
+            return None
+        lines = self.glyph_lines(img)
+        if lines is None:
+            return None
+        if self._templates is None:
+            self._chars = np.array([char for char, samples in self.samples.items() for _ in samples])
+            self._templates = np.stack([glyph for samples in self.samples.values() for glyph, _ in samples])
+            self._aspects = np.array([aspect for samples in self.samples.values() for _, aspect in samples])
+
+        rec_texts = []
+        rec_scores = []
+        for height, glyphs in lines:
+            if not glyphs:
+                return None
+            stacked = np.stack([glyph for _, _, glyph, _ in glyphs])
+            aspects = np.array([aspect for _, _, _, aspect in glyphs])
+            # (字形数, 模板数) 的差异矩阵：像素平均差异加宽高比差异
+            distances = np.abs(stacked[:, None] - self._templates[None]).mean(axis=(2, 3))
+            distances += np.abs(aspects[:, None] - self._aspects[None])
+            best = distances.argmin(axis=1)
+            best_distances = distances[np.arange(len(glyphs)), best]
+            if (best_distances > self.max_distance).any():
+                return None
+            # 与最近的其他字符模板比较，两个字符的差异接近时无法可靠区分
+            other = self._chars[None] != self._chars[best][:, None]
+            runner_up = np.where(other, distances, np.inf).min(axis=1)
+            if (best_distances > self.max_ratio * runner_up).any():
+                return None
+            text = str(self._chars[best[0]])
+            for i in range(1, len(glyphs)):
+                # 只有数字和字母之间可能有空格，数字内部的字形间距不作判断
+                char = str(self._chars[best[i]])
+                if text[-1].isdigit() and not char.isdigit() and glyphs[i][0] - glyphs[i - 1][1] > self.space_ratio * height:
+                    text += ' '
+                text += char
+            if not NUMERIC_LINE_PATTERN.match(text):
+                return None
+            rec_texts.append(text)
+            rec_scores.append(float(1 - best_distances.max()))
+        return rec_texts, rec_scores
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """
+    延迟导入模块，第一次访问模块属性时才真正执行导入
+
+    cv2、numpy 等模块导入需要较长时间，--help、参数错误和只处理 JSON 的路径（如 srk.py 的校验）用不到它们
+    :param name: 模块名
+    :return: 模块对象，已导入时直接返回已导入的模块
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+import json
+import os
+from pathlib import Path
+from lazy import lazy_import
+cv2 = lazy_import('cv2')
+
+# 可选的OCR后端
+BACKENDS = ('paddle', 'tesseract')
+
+
+def save_result_json(result, output_dir, filename):
+    """保存单个单元格的识别结果到 ocr_result/<文件名>/<文件名>_res.json"""
+    cell_output_dir = Path(output_dir) / "ocr_result" / Path(filename).stem
+    cell_output_dir.mkdir(parents=True, exist_ok=True)
+    with open(cell_output_dir / f"{Path(filename).stem}_res.json", 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+class PaddleBackend:
+    """
+    PaddleOCR 后端，识别准确率高，但导入和加载模型需要数秒
+    """
+
+    name = 'paddle'
+
+    def __init__(self, batch_size=None, cpu_threads=None):
+        """
+        :param batch_size: 识别模型每次推理的文本行数量
+        :param cpu_threads: 推理使用的线程数
+        """
+        # 导入PaddleOCR本身需要数秒，只在实际加载模型时导入
+        from paddleocr import PaddleOCR
+        options = {}
+        if batch_size:
+            options['text_recognition_batch_size'] = batch_size
+        if cpu_threads:
+            options['cpu_threads'] = cpu_threads
+        self.ocr = PaddleOCR(
+            use_doc_orientation_classify=False,
+            use_doc_unwarping=False,
+            use_textline_orientation=False,
+            enable_mkldnn=False,
+            **options
+        )
+
+    def recognize(self, inputs, names=None, debug_dir=None):
+        """
+        识别一批图像
+        :param inputs: 图片路径或BGR图像数组列表
+        :param names: 与 inputs 对应的文件名，用于保存调试信息
+        :param debug_dir: 调试信息输出目录，不提供时不保存
+        :return: 每个图像的 {"rec_texts", "rec_scores", "rec_boxes"} 列表，rec_boxes 为 [x0, y0, x1, y1] 列表
+        """
+        results = []
+        for i, res in enumerate(self.ocr.predict(input=inputs)):
+            results.append({
+                'rec_texts': list(res['rec_texts']),
+                'rec_scores': [float(score) for score in res['rec_scores']],
+                'rec_boxes': [[int(v) for v in box] for box in res['rec_boxes']],
+            })
+            if debug_dir and names and names[i]:
+                # 保存PaddleOCR自带的可视化结果和JSON结果到 ocr_result/<文件名> 目录
+                cell_output_dir = Path(debug_dir) / "ocr_result" / Path(names[i]).stem
+                cell_output_dir.mkdir(parents=True, exist_ok=True)
+                res.save_to_img(str(cell_output_dir))
+                res.save_to_json(str(cell_output_dir))
+        return results
+
+
+class TesseractBackend:
+    """
+    Tesseract 后端，纯CPU、启动快，适合字体清晰的榜单，准确率低于 PaddleOCR
+
+    需要安装 tesseract 程序和 pytesseract 包，逐张图像调用 tesseract，batch_size 不生效
+    """
+
+    name = 'tesseract'
+
+    def __init__(self, batch_size=None, cpu_threads=None, lang='eng+chi_sim', config='--psm 6'):
+        """
+        :param batch_size: 不使用，与其他后端保持一致
+        :param cpu_threads: tesseract 使用的线程数
+        :param lang: tesseract 语言包
+        :param config: tesseract 参数，默认按单个文本块识别
+        """
+        try:
+            import pytesseract
+        except ImportError:
+            raise ValueError("使用 tesseract 后端需要先安装 tesseract 程序和 pytesseract 包: pip install pytesseract")
+        self.pytesseract = pytesseract
+        self.lang = lang
+        self.config = config
+        if cpu_threads:
+            os.environ['OMP_THREAD_LIMIT'] = str(cpu_threads)
+
+    def recognize_image(self, img):
+        """
+        识别单张BGR图像，单词按 tesseract 的行编号合并为文本行
+        :return: {"rec_texts", "rec_scores", "rec_boxes"}
+        """
+        data = self.pytesseract.image_to_data(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), lang=self.lang, config=self.config,
+                                              output_type=self.pytesseract.Output.DICT)
+        lines = {}
+        for i, text in enumerate(data['text']):
+            if not text.strip() or float(data['conf'][i]) < 0:
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(i)
+
+        result = {'rec_texts': [], 'rec_scores': [], 'rec_boxes': []}
+        for key in sorted(lines, key=lambda key: min(data['top'][i] for i in lines[key])):
+            words = lines[key]
+            result['rec_texts'].append(' '.join(data['text'][i].strip() for i in words))
+            result['rec_scores'].append(sum(float(data['conf'][i]) for i in words) / len(words) / 100)
+            result['rec_boxes'].append([
+                min(data['left'][i] for i in words),
+                min(data['top'][i] for i in words),
+                max(data['left'][i] + data['width'][i] for i in words),
+                max(data['top'][i] + data['height'][i] for i in words),
+            ])
+        return result
+
+    def recognize(self, inputs, names=None, debug_dir=None):
+        """参数和返回值同 PaddleBackend.recognize"""
+        results = []
+        for i, image in enumerate(inputs):
+            img = cv2.imread(str(image)) if isinstance(image, (str, Path)) else image
+            result = self.recognize_image(img)
+            results.append(result)
+            if debug_dir and names and names[i]:
+                save_result_json(result, debug_dir, names[i])
+        return results
+
+
+def init_backend(backend='paddle', batch_size=None, cpu_threads=None):
+    """
+    初始化OCR后端
+    :param backend: 后端名称，见 BACKENDS
+    :param batch_size: 每次推理的文本行数量
+    :param cpu_threads: 推理使用的线程数
+    :return: 后端实例
+    """
+    if backend == 'paddle':
+        return PaddleBackend(batch_size, cpu_threads)
+    if backend == 'tesseract':
+        return TesseractBackend(batch_size, cpu_threads)
+    raise ValueError(f"不支持的OCR后端: {backend}，可选值: {', '.join(BACKENDS)}")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import os
+from pathlib import Path
+from lazy import lazy_import
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# 缓存文件格式版本，版本 2 起按OCR后端分别保存条目
+CACHE_VERSION = 2
+
+
+def pixel_key(img):
+    """
+    计算图像像素内容的哈希，尺寸不同的图像哈希不同
+    :param img: 图像数组
+    :return: 十六进制字符串
+    """
+    h = hashlib.sha1('x'.join(map(str, img.shape)).encode())
+    h.update(np.ascontiguousarray(img).data)
+    return h.hexdigest()
+
+
+def perceptual_hash(img):
+    """
+    计算图像的差值哈希（dHash），内容相近的图像哈希的汉明距离小
+    :param img: BGR图像数组
+    :return: 64 位无符号整数
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+class OCRCache:
+    """
+    按单元格像素内容索引的OCR结果缓存，保存到JSON文件，跨次运行复用
+
+    tolerance 为 0 时只命中像素完全一致的图像；大于 0 时，像素不一致的图像再按差值哈希查找
+    汉明距离不超过 tolerance 的已缓存图像
+
+    checkpoint 大于 0 时，每新增 checkpoint 条结果保存一次，识别中途退出后重新运行可以从保存的位置继续
+
+    不同OCR后端的识别结果分别保存在同一个文件中，只查找和写入 backend 的条目，切换后端时不会复用其他后端的结果
+    """
+
+    def __init__(self, path=None, tolerance=0, checkpoint=0, backend='paddle'):
+        self.path = path
+        self.tolerance = tolerance
+        self.checkpoint = checkpoint
+        self.backend = backend
+        self.backends = {}
+        self.hits = 0
+        self.misses = 0
+        self._unsaved = 0
+        self._phash_keys = None
+        self._phashes = None
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.backends = data.get('backends', {})
+                    if backend not in self.backends and self.backends:
+                        print(f"OCR缓存文件 {path} 中没有 {backend} 后端的结果，其他后端的结果不会复用")
+                else:
+                    print(f"OCR缓存文件 {path} 版本不一致，将重新生成")
+            except Exception as e:
+                print(f"读取OCR缓存文件 {path} 失败，将重新生成: {e}")
+        self.entries = self.backends.setdefault(backend, {})
+
+    def key(self, img):
+        return pixel_key(img)
+
+    def lookup(self, img, key=None):
+        """
+        查找图像的缓存条目
+        :param img: BGR图像数组
+        :param key: 已计算的像素哈希
+        :return: {"rec_texts", "rec_scores"}，旧版本缓存的条目没有 rec_scores；未命中时为 None
+        """
+        entry = self.entries.get(key or self.key(img))
+        if entry is None and self.tolerance > 0 and self.entries:
+            entry = self._get_similar(perceptual_hash(img))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def get(self, img, key=None):
+        """
+        查找图像的识别结果
+        :param img: BGR图像数组
+        :param key: 已计算的像素哈希
+        :return: rec_texts 数组，未命中时为 None
+        """
+        entry = self.lookup(img, key)
+        return list(entry['rec_texts']) if entry is not None else None
+
+    def _get_similar(self, phash):
+        # 所有已缓存图像的差值哈希一次性按位异或后统计汉明距离
+        if self._phashes is None:
+            self._phash_keys = list(self.entries)
+            self._phashes = np.array([int(self.entries[k]['phash'], 16) for k in self._phash_keys], dtype=np.uint64)
+        xor = np.bitwise_xor(self._phashes, np.uint64(phash))
+        distances = np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] <= self.tolerance:
+            return self.entries[self._phash_keys[best]]
+        return None
+
+    def put(self, img, rec_texts, key=None, rec_scores=None):
+        """
+        保存图像的识别结果
+        :param img: BGR图像数组
+        :param rec_texts: rec_texts 数组
+        :param key: 已计算的像素哈希
+        :param rec_scores: 与 rec_texts 对应的置信度数组
+        """
+        entry = {
+            'rec_texts': list(rec_texts),
+            'phash': f'{perceptual_hash(img):016x}',
+        }
+        if rec_scores is not None:
+            entry['rec_scores'] = [float(score) for score in rec_scores]
+        self.entries[key or self.key(img)] = entry
+        self._phashes = None
+        self._unsaved += 1
+        if self.checkpoint and self._unsaved >= self.checkpoint:
+            self._write()
+
+    def _write(self):
+        if not self.path:
+            return
+        # 先写临时文件再替换，避免中断时留下写了一半的缓存文件
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'backends': self.backends}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        self._unsaved = 0
+
+    def save(self):
+        if not self.path:
+            return
+        self._write()
+        print(f"OCR缓存: 命中 {self.hits} 个，未命中 {self.misses} 个，共 {len(self.entries)} 条，已保存到 {self.path}")
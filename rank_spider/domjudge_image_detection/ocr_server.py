@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import stat
+import sys
+import tempfile
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from ocr_backends import BACKENDS, init_backend
+
+# 服务的运行目录，保存 socket 和认证密钥，只允许当前用户访问
+if sys.platform == 'win32':
+    RUNTIME_DIR = os.path.join(tempfile.gettempdir(), 'domjudge_image_detection')
+elif os.environ.get('XDG_RUNTIME_DIR'):
+    RUNTIME_DIR = os.path.join(os.environ['XDG_RUNTIME_DIR'], 'domjudge_image_detection')
+else:
+    RUNTIME_DIR = os.path.join(tempfile.gettempdir(), f'domjudge_image_detection_{os.getuid()}')
+
+# 默认服务地址：Windows 使用命名管道，其他系统使用运行目录下的 unix socket
+if sys.platform == 'win32':
+    DEFAULT_ADDRESS = r'\\.\pipe\domjudge_image_detection_ocr'
+else:
+    DEFAULT_ADDRESS = os.path.join(RUNTIME_DIR, 'ocr.sock')
+
+# 认证密钥文件，服务启动时生成，客户端连接时用它完成认证
+AUTHKEY_PATH = os.path.join(RUNTIME_DIR, 'authkey')
+
+
+def check_private(path, is_type, type_name):
+    """
+    检查文件属于当前用户且类型正确，防止连接或读取其他用户预先创建的文件
+    :param path: 文件路径，符号链接不会被跟随
+    :param is_type: stat 模块中的类型判断函数，如 stat.S_ISSOCK
+    :param type_name: 类型名称，用于错误信息
+    """
+    if sys.platform == 'win32':
+        return
+    st = os.lstat(path)
+    if not is_type(st.st_mode):
+        raise ValueError(f"{path} 不是{type_name}")
+    if st.st_uid != os.getuid():
+        raise ValueError(f"{path} 不属于当前用户")
+
+
+def ensure_runtime_dir():
+    """创建运行目录，已存在时检查只有当前用户可以访问"""
+    os.makedirs(RUNTIME_DIR, mode=0o700, exist_ok=True)
+    check_private(RUNTIME_DIR, stat.S_ISDIR, '目录')
+    if sys.platform != 'win32' and os.lstat(RUNTIME_DIR).st_mode & 0o077:
+        raise ValueError(f"运行目录 {RUNTIME_DIR} 允许其他用户访问，请删除后重新启动服务")
+
+
+def load_authkey(create=False):
+    """
+    读取认证密钥
+    :param create: 密钥文件不存在时是否生成（权限 0600）
+    :return: 密钥
+    """
+    if create and not os.path.exists(AUTHKEY_PATH):
+        ensure_runtime_dir()
+        fd = os.open(AUTHKEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(32))
+    check_private(AUTHKEY_PATH, stat.S_ISREG, '普通文件')
+    if sys.platform != 'win32' and os.lstat(AUTHKEY_PATH).st_mode & 0o077:
+        raise ValueError(f"认证密钥 {AUTHKEY_PATH} 允许其他用户访问")
+    with open(AUTHKEY_PATH, 'rb') as f:
+        return f.read()
+
+
+class OCRClient:
+    """
+    OCR服务的客户端，按批次把图像发送给常驻的OCR服务识别
+
+    服务与客户端在同一台机器上，图片路径和调试信息目录转换为绝对路径后直接交给服务读写
+    name 为服务使用的OCR后端名称，与本地OCR后端的 name 含义一致
+    """
+
+    def __init__(self, conn, address, name=None):
+        self.conn = conn
+        self.address = address
+        self.name = name
+
+    def predict_batch(self, inputs, names=None, debug_dir=None):
+        """参数和返回值同 convert.predict_batch"""
+        inputs = [os.path.abspath(image) if isinstance(image, (str, Path)) else image for image in inputs]
+        self.conn.send(('predict', (inputs, names, os.path.abspath(debug_dir) if debug_dir else None)))
+        status, value = self.conn.recv()
+        if status != 'ok':
+            raise RuntimeError(f"OCR服务 {self.address} 识别失败: {value}")
+        return value
+
+    def close(self):
+        self.conn.close()
+
+
+def connect_ocr_server(address=DEFAULT_ADDRESS, backend=None):
+    """
+    连接正在运行的OCR服务，socket 不属于当前用户或认证失败时不连接
+    :param address: 服务地址，为空时不使用服务
+    :param backend: 需要的OCR后端名称，服务使用其他后端时不连接；为 None 时不检查
+    :return: OCRClient 实例，服务未运行或无法使用时为 None
+    """
+    if not address or (sys.platform != 'win32' and not os.path.exists(address)):
+        return None
+    try:
+        check_private(address, stat.S_ISSOCK, ' socket')
+        authkey = load_authkey()
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"警告: 不使用OCR服务 {address}: {e}")
+        return None
+    try:
+        conn = Client(address, authkey=authkey)
+        conn.send(('info', None))
+        status, info = conn.recv()
+    except (OSError, EOFError, AuthenticationError):
+        return None
+    name = info.get('backend') if status == 'ok' else None
+    if backend is not None and name != backend:
+        conn.close()
+        print(f"警告: 不使用OCR服务 {address}: 服务的OCR后端为 {name or '未知'}，与指定的 {backend} 不一致")
+        return None
+    return OCRClient(conn, address, name)
+
+
+def serve(address=DEFAULT_ADDRESS, batch_size=16, cpu_threads=None, backend='paddle'):
+    """
+    加载OCR模型并常驻，依次处理客户端发来的识别请求，直到收到停止请求
+    :param address: 服务地址
+    :param batch_size: 识别模型每次推理的文本行数量
+    :param cpu_threads: 推理使用的线程数
+    :param backend: OCR后端名称
+    """
+    from convert import predict_batch
+
+    ensure_runtime_dir()
+    authkey = load_authkey(create=True)
+    client = connect_ocr_server(address)
+    if client is not None:
+        client.close()
+        raise ValueError(f"OCR服务已在 {address} 运行")
+    if sys.platform != 'win32' and os.path.lexists(address):
+        # 上次运行遗留的 socket 文件，只删除当前用户的 socket
+        check_private(address, stat.S_ISSOCK, ' socket')
+        os.remove(address)
+
+    print(f"初始化OCR后端: {backend}...")
+    ocr = init_backend(backend, batch_size, cpu_threads)
+    listener = Listener(address, authkey=authkey)
+    if sys.platform != 'win32':
+        os.chmod(address, 0o600)
+    print(f"OCR服务已启动: {address}")
+
+    try:
+        running = True
+        while running:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError, EOFError) as e:
+                print(f"拒绝未通过认证的连接: {e}")
+                continue
+            print("客户端已连接")
+            count = 0
+            start_time = time.time()
+            while True:
+                try:
+                    command, payload = conn.recv()
+                except (EOFError, OSError):
+                    break
+                if command == 'stop':
+                    running = False
+                    conn.send(('ok', None))
+                    break
+                if command == 'info':
+                    conn.send(('ok', {'backend': backend}))
+                    continue
+                try:
+                    conn.send(('ok', predict_batch(ocr, *payload)))
+                    count += len(payload[0])
+                except Exception as e:
+                    conn.send(('error', str(e)))
+            conn.close()
+            print(f"客户端已断开，识别 {count} 张图像，耗时 {time.time() - start_time:.3f}")
+    finally:
+        listener.close()
+    print("OCR服务已停止")
+
+
+def stop_server(address=DEFAULT_ADDRESS):
+    """
+    停止正在运行的OCR服务
+    :return: 是否已停止
+    """
+    client = connect_ocr_server(address)
+    if client is None:
+        return False
+    client.conn.send(('stop', None))
+    client.conn.recv()
+    client.close()
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='常驻的本地OCR服务，模型只加载一次，convert.py 和 pipeline.py 使用 --ocr-server 时交给服务识别',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--address', default=DEFAULT_ADDRESS, help='服务地址（unix socket 路径或 Windows 命名管道），认证密钥保存在运行目录中')
+    parser.add_argument('--backend', choices=BACKENDS, default='paddle', help='OCR后端')
+    parser.add_argument('-b', '--batch-size', type=int, default=16, help='识别模型每次推理的文本行数量')
+    parser.add_argument('--cpu-threads', type=int, help='推理使用的线程数')
+    parser.add_argument('--stop', action='store_true', help='停止正在运行的服务')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.stop:
+        if stop_server(args.address):
+            print(f"已停止OCR服务: {args.address}")
+            return 0
+        print(f"OCR服务未运行: {args.address}")
+        return 1
+
+    try:
+        serve(args.address, args.batch_size, args.cpu_threads, args.backend)
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("OCR服务已停止")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
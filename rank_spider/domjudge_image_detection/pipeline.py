@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from detect import ARTIFACT_LEVELS, load_image, detect_table_regions, optimize_cell_image, save_detection_results
+from convert import (CHECKPOINT_INTERVAL, LazyOCR, collect_scores, recognize_jobs, recognize_table_rows, to_bgr,
+                     save_to_csv, save_to_json, print_statistics)
+from srk import check_data, convert_data
+from ocr_cache import OCRCache
+from ocr_server import DEFAULT_ADDRESS, connect_ocr_server
+from ocr_backends import BACKENDS
+from verdict import FIRST_STATUS_COL, classify_verdicts
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='榜单截图一步转换到 srk：检测表格、OCR 识别、转换数据，中间结果只在内存中传递',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('image_path', help='输入图片路径，也可以是保存RGB图像数组的 .npy 文件')
+    parser.add_argument('-o', '--output', required=True, help='srk 输出文件路径')
+    parser.add_argument('--debug', help='调试输出目录，指定时保存检测结果和识别结果，目录结构与分步执行时一致')
+    parser.add_argument('--artifacts', choices=ARTIFACT_LEVELS, default='none', help='调试输出时保存的图片级别')
+    parser.add_argument('--strip-height', type=int, default=0, help='分块处理时每个条带的高度（像素），0 表示整图处理')
+    parser.add_argument('-b', '--batch-size', type=int, default=16, help='批量识别时每批的单元格数量')
+    parser.add_argument('--cache', help='OCR结果缓存文件路径，像素一致的单元格直接复用已识别的结果')
+    parser.add_argument('--cache-tolerance', type=int, default=0, help='缓存按差值哈希模糊匹配时允许的汉明距离')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='识别进程数，每个进程各自加载一个OCR模型')
+    parser.add_argument('--no-verdict', action='store_true', help='不按背景色判定状态单元格的结果')
+    parser.add_argument('--backend', choices=BACKENDS, default='paddle', help='OCR后端，同 convert.py')
+    parser.add_argument('--ocr-server', nargs='?', const=DEFAULT_ADDRESS,
+                        help='使用常驻OCR服务识别，可指定服务地址，不提供地址时使用 ocr_server.py 的默认地址；服务未运行时使用本地OCR后端')
+    parser.add_argument('--rows', action='store_true', help='整行识别表格主体，按表头的列范围分配文本')
+    parser.add_argument('--digits', action='store_true', help='数字列使用模板匹配识别，只有无法匹配的单元格使用OCR')
+    parser.add_argument('--penalty', type=int, default=20, help='每次错误提交的罚时（分钟），用于检查罚时与各题状态是否一致')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.image_path):
+        parser.error(f"输入图片路径 '{args.image_path}' 不存在")
+
+    return args
+
+
+def recognize_cells(ocr, img, header_cells, body_rows, batch_size=16, cache=None, classify=True, workers=1,
+                    digits=False, table_x0=None, table_x1=None, penalty=20):
+    """
+    裁剪并批量识别所有单元格，图像不落盘
+
+    Args:
+        ocr: OCR后端实例
+        img: RGB原图
+        header_cells: 表头单元格列表
+        body_rows: 表格主体行列表
+        batch_size: 每批的单元格数量
+        cache: OCRCache 实例
+        classify: 是否按背景色判定状态单元格的结果，判定为空的单元格不再识别
+        workers: 识别进程数
+        digits: 数字列是否使用模板匹配识别
+        table_x0: 表格左边界，与 table_x1 同时提供时整行识别表格主体
+        table_x1: 表格右边界
+        penalty: 每次错误提交的罚时（分钟），用于检查模板匹配结果
+
+    Returns:
+        tuple: (表头rec_texts数组列表, 表格主体rec_texts数组列表, 优化后的表头单元格RGB图像列表, 状态判定结果列表,
+                置信度 {"header", "body"})
+    """
+    # 优化后的单元格是原图的切片，不复制像素；送入OCR前按批次转换为BGR
+    header_images = [optimize_cell_image(img, cell)[0] for cell in header_cells]
+    jobs = [(('header', i), -1, cell_img) for i, cell_img in enumerate(header_images)]
+    header_keys = [('header', i) for i in range(len(header_cells))]
+    scores = {}
+    if table_x0 is not None and table_x1 is not None:
+        rows = [row for row in body_rows if row['cells']]
+        strips = [img[row['y0']:row['y1'], table_x0:table_x1] for row in rows]
+        results, verdicts = recognize_table_rows(ocr, jobs, strips, header_cells, rows, table_x0, batch_size,
+                                                 cache=cache, classify=classify, workers=workers, digits=digits,
+                                                 scores=scores, penalty=penalty)
+        body_keys = [[(row_idx, col) for col in range(len(row['cells']))] for row_idx, row in enumerate(rows)]
+        header_rec_texts = [results[key] for key in header_keys]
+        body_rec_texts = [[results.get(key, []) for key in keys] for keys in body_keys]
+        body_verdicts = [[verdicts.get(key) for key in keys] for keys in body_keys] if classify else None
+        return (header_rec_texts, body_rec_texts, header_images, body_verdicts,
+                collect_scores(scores, results, header_keys, body_keys))
+
+    body_keys = []
+    verdicts = {}
+    for row_idx, row in enumerate(body_rows):
+        row_jobs = [((row_idx, col), col, optimize_cell_image(img, cell)[0]) for col, cell in enumerate(row['cells'])]
+        if classify:
+            # 按行判定状态单元格，空单元格直接移出识别队列
+            status_jobs = row_jobs[FIRST_STATUS_COL:]
+            for job, verdict in zip(status_jobs, classify_verdicts([job[2] for job in status_jobs])):
+                verdicts[job[0]] = verdict
+        jobs.extend(job for job in row_jobs if verdicts.get(job[0]) != '')
+        if row_jobs:  # 只添加非空行
+            body_keys.append([job[0] for job in row_jobs])
+
+    results = recognize_jobs(ocr, jobs, batch_size, prepare=to_bgr, cache=cache, workers=workers, digits=digits,
+                             scores=scores, verdicts=verdicts, penalty=penalty)
+    header_rec_texts = [results[key] for key in header_keys]
+    body_rec_texts = [[results.get(key, []) for key in keys] for keys in body_keys]
+    body_verdicts = [[verdicts.get(key) for key in keys] for keys in body_keys] if classify else None
+    return (header_rec_texts, body_rec_texts, header_images, body_verdicts,
+            collect_scores(scores, results, header_keys, body_keys))
+
+
+def run_pipeline(image, ocr=None, strip_height=None, debug_dir=None, artifacts='none', batch_size=16, cache=None,
+                 classify=True, workers=1, digits=False, rows=False, backend='paddle', regions=None,
+                 penalty=20):
+    """
+    在同一进程内完成检测、识别和转换
+
+    Args:
+        image: 图片路径、.npy 文件路径或RGB图像数组
+        ocr: OCR后端实例或 OCRClient 实例，不提供时按 backend 在第一次识别时初始化
+        strip_height: 分块处理时每个条带的高度
+        debug_dir: 调试输出目录，不提供时不写任何中间文件
+        artifacts: 调试输出时保存的图片级别
+        batch_size: 批量识别时每批的单元格数量
+        cache: OCRCache 实例，不提供时不使用缓存
+        classify: 是否按背景色判定状态单元格的结果
+        workers: 识别进程数，大于 1 时每个进程各自初始化OCR后端
+        digits: 数字列是否使用模板匹配识别
+        rows: 是否整行识别表格主体，每行只调用一次OCR
+        backend: OCR后端名称
+        regions: 已有的检测结果（如在其他进程中检测），提供时不再检测
+        penalty: 每次错误提交的罚时（分钟），用于检查罚时与各题状态是否一致
+
+    Returns:
+        tuple: (识别结果 {"header", "body", "scores"}, srk 数据；校验失败时为 None, 校验警告列表, 检测结果)
+    """
+    img = load_image(image)
+
+    print("\n步骤 1/3: 检测表格区域")
+    if regions is None:
+        regions = detect_table_regions(img, strip_height=strip_height)
+    else:
+        print("使用已有的检测结果")
+    if debug_dir:
+        save_detection_results(img, regions, debug_dir, artifacts, rows=rows)
+
+    print("\n步骤 2/3: OCR 识别")
+    if ocr is None:
+        ocr = LazyOCR(backend, batch_size if batch_size > 1 else None)
+    bounds = regions['table_bounds'] if rows else {}
+    try:
+        header_rec_texts, body_rec_texts, header_images, body_verdicts, scores = recognize_cells(
+            ocr, img, regions['header_cells'], regions['body']['rows'], batch_size, cache, classify, workers, digits,
+            bounds.get('x0'), bounds.get('x1'), penalty)
+    finally:
+        # 识别中途出错时也保存已识别的结果，重新运行时从中断的位置继续
+        if cache is not None:
+            cache.save()
+    input_data = {"header": header_rec_texts, "body": body_rec_texts}
+    if body_verdicts is not None:
+        input_data["verdicts"] = body_verdicts
+    input_data["scores"] = scores
+
+    if debug_dir:
+        save_to_csv(['\\n'.join(texts) for texts in header_rec_texts],
+                    [['\\n'.join(texts) for texts in row] for row in body_rec_texts],
+                    Path(debug_dir) / "result.csv")
+        save_to_json(header_rec_texts, body_rec_texts, Path(debug_dir) / "result.json", body_verdicts, scores)
+
+    print("\n步骤 3/3: 转换到 srk")
+    warnings = []
+    check_data(input_data, warnings, penalty)
+    if warnings:
+        return input_data, None, warnings, regions
+    return input_data, convert_data(input_data, header_images=header_images), warnings, regions
+
+
+def save_outputs(output_path, input_data, output_data, warnings):
+    """
+    保存 srk 数据；校验失败时输出警告，并把识别结果保存到输出路径旁的 .result.json 文件
+
+    Args:
+        output_path: srk 输出文件路径
+        input_data: 识别结果 {"header", "body", "verdicts", "scores"}
+        output_data: srk 数据，校验失败时为 None
+        warnings: 校验警告列表
+
+    Returns:
+        bool: 是否校验通过并保存了 srk 数据
+    """
+    if warnings:
+        for warning in warnings:
+            print(warning)
+        print(f"\n字段合法性校验失败，总共发现 {len(warnings)} 个问题")
+        # 保存识别结果，人工校对后可继续使用 srk.py 转换
+        result_path = Path(output_path).with_suffix('.result.json')
+        save_to_json(input_data['header'], input_data['body'], result_path, input_data.get('verdicts'),
+                     input_data['scores'])
+        print(f"请校对 {result_path} 后使用 srk.py 完成转换，可以使用 srk.py --review 生成按优先级排列的复核队列")
+        return False
+
+    print("字段合法性校验通过，请确保已人工校对所有字符串和数值数据。")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    print(f"数据转换完成，结果已保存到: {output_path}")
+    return True
+
+
+def main():
+    """主函数"""
+    start_time = time.time()
+    args = parse_args()
+
+    ocr = connect_ocr_server(args.ocr_server, args.backend)
+    if ocr is None and args.ocr_server:
+        print(f"OCR服务 {args.ocr_server} 不可用，使用本地OCR后端: {args.backend}")
+    if ocr is not None:
+        print(f"使用OCR服务: {args.ocr_server}")
+
+    try:
+        input_data, output_data, warnings, regions = run_pipeline(
+            args.image_path,
+            ocr=ocr,
+            strip_height=args.strip_height,
+            debug_dir=args.debug,
+            artifacts=args.artifacts,
+            batch_size=args.batch_size,
+            cache=OCRCache(args.cache, args.cache_tolerance, CHECKPOINT_INTERVAL, args.backend) if args.cache else None,
+            classify=not args.no_verdict,
+            workers=args.workers,
+            digits=args.digits,
+            rows=args.rows,
+            backend=args.backend,
+            penalty=args.penalty
+        )
+    except Exception as e:
+        print(f"处理失败: {e}")
+        return 1
+
+    total_cells = len(regions['header_cells']) + sum(len(row['cells']) for row in regions['body']['rows'])
+    print_statistics(regions['header_cells'], regions['body']['rows'], total_cells, time.time() - start_time)
+
+    if not save_outputs(args.output, input_data, output_data, warnings):
+        return 1
+    print(f"请手动填充或核对题目 FB，并填充 official、markers 和 series 奖牌配置数据。")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 import argparse
+import html
 import json
+import re
+import shutil
 import sys
-import cv2
-import numpy as np
-from collections import Counter
 from pathlib import Path
+from lazy import lazy_import
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
 
 
 def parse_args():
@@ -13,10 +16,17 @@ def parse_args():
     parser = argparse.ArgumentParser(description='转换表格数据到 srk')
     parser.add_argument('input', help='输入 JSON 文件路径')
     parser.add_argument('-o', '--output', help='输出文件路径')
-    parser.add_argument('-d', '--detection', help='detection目录路径，用于检测表头背景色')
+    parser.add_argument('-d', '--detection', help='detection目录路径，用于检测表头背景色和复核队列中的单元格图片')
+    parser.add_argument('--review', help='复核队列输出目录，保存需要人工复核的单元格列表和图片')
+    parser.add_argument('--min-score', type=float, default=0.9, help='复核队列中识别置信度的下限，低于该值的单元格需要复核')
+    parser.add_argument('--penalty', type=int, default=20, help='每次错误提交的罚时（分钟），校验和生成复核队列时用于检查罚时与各题状态是否一致')
     return parser.parse_args()
 
 
+# 校验警告中指向的单元格，如 body[3][1] 或 header[2]
+WARNING_CELL_PATTERN = re.compile(r'^\S+: (header|body)\[(\d+)\](?:\[(\d+)\])?')
+
+
 def is_empty_cell(cell):
     """检查单元格是否为空"""
     return len(cell) == 0 or (len(cell) == 1 and cell[0] == "")
@@ -52,8 +62,8 @@ def check_header(header, warnings):
             warnings.append(f"警告: header[{i}] 内容为空串 - 内容: {format_cell_content(cell)}")
 
 
-def check_body_row(row_idx, row, warnings):
-    """检查表格主体中单行的正确性"""
+def check_body_row(row_idx, row, warnings, verdicts=None):
+    """检查表格主体中单行的正确性，verdicts 为该行按背景色判定的状态结果"""
     if len(row) < 2:
         warnings.append(f"警告: body[{row_idx}] 行长度不足2，当前长度为 {len(row)}")
         return
@@ -97,10 +107,45 @@ def check_body_row(row_idx, row, warnings):
             first_item = cell[0]
             if not is_integer_string(first_item):
                 warnings.append(f"警告: body[{row_idx}][{i}][0] 不是可转换为整数的字符串: '{first_item}' - 内容: {format_cell_content(cell)}")
+        
+        # 2.4.4: 如果有颜色判定结果，检查识别内容与判定结果是否一致
+        verdict = verdicts[i] if verdicts and i < len(verdicts) else None
+        if verdict in ('AC', 'FB') and len(cell) != 2:
+            warnings.append(f"警告: body[{row_idx}][{i}] 颜色判定为 {verdict}，但识别内容不是通过时间和尝试次数 - 内容: {format_cell_content(cell)}")
+        elif verdict in ('RJ', '?') and len(cell) != 1:
+            warnings.append(f"警告: body[{row_idx}][{i}] 颜色判定为 {verdict}，但识别内容不是尝试次数 - 内容: {format_cell_content(cell)}")
+
+
+def check_score(row_idx, row, warnings, verdicts=None, penalty=20):
+    """
+    检查解题数和罚时是否与各题状态一致，verdicts 为该行按背景色判定的状态结果，penalty 为每次错误提交的罚时（分钟）
+    内容无法转换为整数的单元格已由 check_body_row 报告，这里不再检查；返回是否完成了检查
+    """
+    if len(row) < 2 or len(row[1]) != 2:
+        return False
+    try:
+        value, time = int(row[1][0]), int(row[1][1])
+        solved = 0
+        penalty_time = 0
+        for i in range(2, len(row)):
+            cell = row[i]
+            verdict = verdicts[i] if verdicts and i < len(verdicts) else None
+            if is_empty_cell(cell) or len(cell) != 2 or verdict not in (None, 'AC', 'FB'):
+                continue
+            solved += 1
+            penalty_time += int(cell[0]) + penalty * (extract_tries_from_string(cell[1]) - 1)
+    except ValueError:
+        return False
+    
+    if value != solved:
+        warnings.append(f"警告: body[{row_idx}][1] 解题数 {value} 与通过的题目数 {solved} 不一致 - 内容: {format_cell_content(row[1])}")
+    elif time != penalty_time:
+        warnings.append(f"警告: body[{row_idx}][1] 罚时 {time} 与按通过时间和尝试次数计算的 {penalty_time} 不一致 - 内容: {format_cell_content(row[1])}")
+    return True
 
 
-def check_json_file(input_path, warnings):
-    """检查JSON文件的正确性"""
+def check_json_file(input_path, warnings, penalty=20):
+    """检查JSON文件的正确性，penalty 为每次错误提交的罚时（分钟）"""
     try:
         with open(input_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
@@ -114,6 +159,11 @@ def check_json_file(input_path, warnings):
         warnings.append(f"错误: 读取文件失败: {e}")
         return False
     
+    return check_data(data, warnings, penalty)
+
+
+def check_data(data, warnings, penalty=20):
+    """检查识别结果数据的正确性，包括解题数和罚时与各题状态是否一致，penalty 为每次错误提交的罚时（分钟）"""
     # 检查数据结构
     if not isinstance(data, dict):
         warnings.append("错误: 根节点不是字典类型")
@@ -138,11 +188,14 @@ def check_json_file(input_path, warnings):
     check_header(header, warnings)
     
     # 检查表格主体
+    verdicts = data.get('verdicts') or []
     for row_idx, row in enumerate(body):
         if not isinstance(row, list):
             warnings.append(f"错误: body[{row_idx}] 不是数组类型")
             continue
-        check_body_row(row_idx, row, warnings)
+        row_verdicts = verdicts[row_idx] if row_idx < len(verdicts) else None
+        check_body_row(row_idx, row, warnings, row_verdicts)
+        check_score(row_idx, row, warnings, row_verdicts, penalty)
     
     return True
 
@@ -158,43 +211,72 @@ def extract_tries_from_string(s):
         return int(s)
 
 
-def convert_problems(header, detection_data=None, detection_dir=None):
-    """转换header[2:]为problems数组"""
+def convert_problems(header, detection_data=None, detection_dir=None, header_images=None):
+    """转换header[2:]为problems数组，header_images 为按表头单元格索引排列的RGB图像，提供时直接用于检测背景色"""
+    indices = [i for i in range(2, len(header)) if len(header[i]) > 0]
+    
+    # 收集需要检测背景色的表头图像，所有表头一次批量检测
+    images = {}
+    labels = {}
+    if header_images is not None:
+        # 如果提供了表头图像，直接检测背景色
+        for i in indices:
+            if i < len(header_images):
+                images[i] = header_images[i]
+                labels[i] = header[i][0]
+    elif detection_data and detection_dir:
+        # 如果提供了detection数据，读取表头图片检测背景色
+        for i in indices:
+            cell_index = i  # 转换为detection中的索引
+            filename = get_header_cell_filename(detection_data, cell_index)
+            if filename:
+                image_path = Path(detection_dir) / "detection_result_optimized" / filename
+                if image_path.exists():
+                    img = cv2.imread(str(image_path))
+                    images[i] = cv2.cvtColor(img, cv2.COLOR_BGR2RGB) if img is not None else np.zeros((0, 0, 3), np.uint8)
+                    labels[i] = f"{header[i][0]}, {filename}"
+                else:
+                    print(f"警告: 表头图片文件不存在: {image_path}")
+    
+    try:
+        background_colors = dict(zip(images, detect_background_colors(list(images.values()))))
+    except Exception as e:
+        print(f"检测表头背景色时出错: {e}")
+        background_colors = {}
+    
     problems = []
-    for i in range(2, len(header)):
-        if len(header[i]) > 0:
-            problem = {
-                "alias": header[i][0],
-                "style": {
-                    "backgroundColor": ""
-                }
+    for i in indices:
+        problem = {
+            "alias": header[i][0],
+            "style": {
+                "backgroundColor": ""
             }
-            
-            # 如果提供了detection数据，尝试检测背景色
-            if detection_data and detection_dir:
-                cell_index = i  # 转换为detection中的索引
-                filename = get_header_cell_filename(detection_data, cell_index)
-                if filename:
-                    image_path = Path(detection_dir) / "detection_result_optimized" / filename
-                    if image_path.exists():
-                        background_color = detect_background_color(image_path)
-                        if background_color:
-                            problem["style"]["backgroundColor"] = background_color
-                            print(f"检测到表头 {i} ({header[i][0]}, {filename}) 的背景色: {background_color}")
-                        else:
-                            print(f"表头 {i} ({header[i][0]}) 未检测到背景色或为白色")
-                    else:
-                        print(f"警告: 表头图片文件不存在: {image_path}")
-            
-            problems.append(problem)
+        }
+        
+        if i in images:
+            background_color = background_colors.get(i)
+            if background_color:
+                problem["style"]["backgroundColor"] = background_color
+                print(f"检测到表头 {i} ({labels[i]}) 的背景色: {background_color}")
+            else:
+                print(f"表头 {i} ({header[i][0]}) 未检测到背景色或为白色")
+        
+        problems.append(problem)
     return problems
 
 
-def convert_status(cell):
-    """转换单个状态单元格"""
+def convert_status(cell, verdict=None):
+    """转换单个状态单元格，verdict 为按背景色判定的结果，提供时优先使用"""
     if is_empty_cell(cell):
         return {"result": None}
     
+    if verdict and len(cell) in (1, 2):
+        status = {"result": verdict}
+        if verdict in ('AC', 'FB') and len(cell) == 2:
+            status["time"] = [int(cell[0]), "min"]
+        status["tries"] = extract_tries_from_string(cell[-1])
+        return status
+    
     if len(cell) == 1:
         # 长度为1时，结果为"RJ"
         tries = extract_tries_from_string(cell[0])
@@ -218,8 +300,8 @@ def convert_status(cell):
         return {"result": None}
 
 
-def convert_row(row):
-    """转换单行数据"""
+def convert_row(row, verdicts=None):
+    """转换单行数据，verdicts 为该行按背景色判定的状态结果"""
     if len(row) < 2:
         return None
     
@@ -240,7 +322,7 @@ def convert_row(row):
     # 转换statuses信息
     statuses = []
     for i in range(2, len(row)):
-        status = convert_status(row[i])
+        status = convert_status(row[i], verdicts[i] if verdicts and i < len(verdicts) else None)
         statuses.append(status)
     
     return {
@@ -250,7 +332,7 @@ def convert_row(row):
     }
 
 
-def convert_data(input_data, detection_data=None, detection_dir=None):
+def convert_data(input_data, detection_data=None, detection_dir=None, header_images=None):
     """转换输入数据为最终格式"""
     # 读取模板文件
     template_path = Path(__file__).parent / "template.srk.json"
@@ -263,12 +345,13 @@ def convert_data(input_data, detection_data=None, detection_dir=None):
         raise ValueError(f"模板文件JSON格式错误: {e}")
     
     # 转换problems
-    template["problems"] = convert_problems(input_data["header"], detection_data, detection_dir)
+    template["problems"] = convert_problems(input_data["header"], detection_data, detection_dir, header_images)
     
     # 转换rows
     rows = []
-    for row in input_data["body"]:
-        converted_row = convert_row(row)
+    verdicts = input_data.get("verdicts") or []
+    for row_idx, row in enumerate(input_data["body"]):
+        converted_row = convert_row(row, verdicts[row_idx] if row_idx < len(verdicts) else None)
         if converted_row is not None:
             rows.append(converted_row)
     
@@ -295,59 +378,72 @@ def is_white_region(pixels, threshold=0.9):
     :param threshold: 判断为白色的像素比例阈值
     :return: bool
     """
-    white_pixels = np.array([is_white(pixel) for pixel in pixels])
-    return np.mean(white_pixels) > threshold
+    return np.mean((pixels >= 240).all(axis=-1)) > threshold
+
+
+def detect_background_colors(images, color_threshold=50, min_ratio=0.1):
+    """
+    批量检测多张图片中最主要的背景色，所有图片的像素一起统计
+    :param images: RGB图像数组列表
+    :param color_threshold: 颜色相似度阈值
+    :param min_ratio: 最小占比阈值
+    :return: 每张图片的RGB颜色字符串或None
+    """
+    result = [None] * len(images)
+    indices = [i for i, img in enumerate(images) if img.size and not is_white_region(img.reshape(-1, 3))]
+    if not indices:
+        return result
+    
+    # 颜色打包为 0xRRGGBB，高位放图片序号，一次 np.unique 统计每张图片中每种颜色的数量
+    sizes = np.array([images[i].shape[0] * images[i].shape[1] for i in indices])
+    pixels = np.concatenate([images[i].reshape(-1, 3) for i in indices]).astype(np.uint32)
+    colors = (pixels[:, 0] << 16) | (pixels[:, 1] << 8) | pixels[:, 2]
+    keys = (np.repeat(np.arange(len(indices), dtype=np.uint64), sizes) << np.uint64(24)) | colors
+    unique_keys, first_index, counts = np.unique(keys, return_index=True, return_counts=True)
+    image_ids = (unique_keys >> np.uint64(24)).astype(np.int64)
+    unique_colors = (unique_keys & np.uint64(0xFFFFFF)).astype(np.int64)
+    
+    # 每张图片出现最多的颜色，数量相同时取最先出现的颜色（与 Counter.most_common 一致）
+    order = np.lexsort((first_index, -counts, image_ids))
+    best = order[np.searchsorted(image_ids[order], np.arange(len(indices)))]
+    best_colors = unique_colors[best]
+    
+    # 统计与最多颜色相似（包含完全一致）的颜色的总数量
+    channels = np.stack([(unique_colors >> shift) & 0xFF for shift in (16, 8, 0)], axis=1)
+    best_channels = channels[best][image_ids]
+    distances = np.abs(channels - best_channels).sum(axis=1)
+    similar_counts = np.bincount(image_ids, weights=counts * (distances <= color_threshold), minlength=len(indices))
+    
+    for i, color, similar_count, size in zip(indices, best_colors, similar_counts, sizes):
+        if similar_count / size >= min_ratio:
+            result[i] = f"rgb({color >> 16}, {(color >> 8) & 0xFF}, {color & 0xFF})"
+    return result
 
 
 def detect_background_color(image_path, color_threshold=50, min_ratio=0.1):
     """
     检测图片中最主要的背景色
-    :param image_path: 图片路径
+    :param image_path: 图片路径或RGB图像数组
     :param color_threshold: 颜色相似度阈值
     :param min_ratio: 最小占比阈值
     :return: RGB颜色字符串或None
     """
     try:
-        # 读取图片
-        img = cv2.imread(str(image_path))
-        if img is None:
-            return None
-        
-        # 转换为RGB
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        
-        # 检查是否为白色区域
-        if is_white_region(img.reshape(-1, 3)):
-            return None
-        
-        # 统计所有像素的颜色
-        pixels = img.reshape(-1, 3)
-        color_counts = Counter(map(tuple, pixels))
-        
-        # 找到出现最多的颜色
-        most_common_color, max_count = color_counts.most_common(1)[0]
-        total_pixels = len(pixels)
-        
-        # 统计所有与most_common_color相似（包含完全一致）的颜色的总数量
-        similar_color_count = 0
-        for color, count in color_counts.items():
-            # 计算颜色距离
-            distance = np.sum(np.abs(np.array(color) - np.array(most_common_color)))
-            if distance <= color_threshold:
-                similar_color_count += count
-        
-        # 计算相似颜色的占比
-        similar_ratio = similar_color_count / total_pixels
-        
-        # 如果占比小于阈值，返回None
-        if similar_ratio < min_ratio:
-            return None
+        if isinstance(image_path, np.ndarray):
+            img = image_path
+        else:
+            # 读取图片
+            img = cv2.imread(str(image_path))
+            if img is None:
+                return None
+            
+            # 转换为RGB
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         
-        # 返回RGB格式的字符串
-        return f"rgb({most_common_color[0]}, {most_common_color[1]}, {most_common_color[2]})"
+        return detect_background_colors([img], color_threshold, min_ratio)[0]
         
     except Exception as e:
-        print(f"检测背景色时出错 {image_path}: {e}")
+        print(f"检测背景色时出错 {image_path if not isinstance(image_path, np.ndarray) else '图像数组'}: {e}")
         return None
 
 
@@ -383,6 +479,127 @@ def get_header_cell_filename(detection_data, cell_index):
         return None
 
 
+def get_cell_filename(detection_data, row, col):
+    """
+    根据detection数据获取单元格的文件名，row 为 'header' 或识别结果中表格主体的行索引（不含空行）
+    :return: 文件名或None
+    """
+    if not detection_data:
+        return None
+    if row == 'header':
+        return get_header_cell_filename(detection_data, col)
+    rows = [r for r in detection_data.get("body", {}).get("rows", []) if r.get("cells")]
+    if row < len(rows) and col is not None and col < len(rows[row]["cells"]):
+        return rows[row]["cells"][col].get("filename")
+    return None
+
+
+def build_review_queue(data, min_score=0.9, penalty=20):
+    """
+    生成需要人工复核的单元格队列
+    违反校验规则的单元格排在前面，其余为识别置信度低于 min_score 的单元格，同类按置信度从低到高排列
+    :param data: 识别结果数据，scores 字段为 convert.py 保存的每段文本的置信度
+    :param min_score: 识别置信度的下限
+    :param penalty: 每次错误提交的罚时（分钟）
+    :return: [{"cell", "row", "col", "texts", "score", "reasons"}] 列表，score 为单元格内各段文本置信度的最小值
+    """
+    header = data.get('header', [])
+    body = data.get('body', [])
+    scores = data.get('scores') or {}
+    header_scores = scores.get('header') or []
+    body_scores = scores.get('body') or []
+    verdicts = data.get('verdicts') or []
+    
+    # 校验警告按所指向的单元格归类
+    warnings = []
+    check_header(header, warnings)
+    for row_idx, row in enumerate(body):
+        row_verdicts = verdicts[row_idx] if row_idx < len(verdicts) else None
+        check_body_row(row_idx, row, warnings, row_verdicts)
+        check_score(row_idx, row, warnings, row_verdicts, penalty)
+    violations = {}
+    for warning in warnings:
+        match = WARNING_CELL_PATTERN.match(warning)
+        if match:
+            row = 'header' if match.group(1) == 'header' else int(match.group(2))
+            col = int(match.group(2)) if row == 'header' else (int(match.group(3)) if match.group(3) else None)
+            violations.setdefault((row, col), []).append(warning)
+    
+    def cell_score(cell_scores):
+        known = [score for score in cell_scores or [] if score is not None]
+        return min(known) if known else None
+    
+    cells = [('header', i, texts, header_scores[i] if i < len(header_scores) else None)
+             for i, texts in enumerate(header)]
+    for row_idx, row in enumerate(body):
+        row_scores = body_scores[row_idx] if row_idx < len(body_scores) else []
+        cells.extend((row_idx, col, texts, row_scores[col] if col < len(row_scores) else None)
+                     for col, texts in enumerate(row))
+        if (row_idx, None) in violations:
+            cells.append((row_idx, None, None, None))
+    
+    queue = []
+    for row, col, texts, cell_scores in cells:
+        score = cell_score(cell_scores)
+        reasons = list(violations.get((row, col), []))
+        if score is not None and score < min_score:
+            reasons.append(f"识别置信度 {score:.3f} 低于 {min_score}")
+        if not reasons:
+            continue
+        name = f"header[{col}]" if row == 'header' else (f"body[{row}][{col}]" if col is not None else f"body[{row}]")
+        queue.append({
+            "cell": name,
+            "row": row,
+            "col": col,
+            "texts": texts,
+            "score": score,
+            "reasons": reasons,
+            "violation": (row, col) in violations
+        })
+    queue.sort(key=lambda item: (not item["violation"], item["score"] if item["score"] is not None else 1.0))
+    for item in queue:
+        del item["violation"]
+    return queue
+
+
+def save_review_queue(queue, output_dir, detection_data=None, detection_dir=None):
+    """
+    保存复核队列到 review.json 和 review.html，单元格图片复制到 crops 目录
+    :param queue: build_review_queue 生成的复核队列
+    :param output_dir: 输出目录
+    :param detection_data: detection数据，提供时附带单元格图片
+    :param detection_dir: detection目录路径
+    """
+    output_dir = Path(output_dir)
+    crops_dir = output_dir / "crops"
+    crops_dir.mkdir(parents=True, exist_ok=True)
+    for item in queue:
+        item["image"] = None
+        filename = get_cell_filename(detection_data, item["row"], item["col"])
+        if filename and detection_dir:
+            image_path = Path(detection_dir) / "detection_result_optimized" / filename
+            if image_path.exists():
+                shutil.copy(image_path, crops_dir / filename)
+                item["image"] = f"crops/{filename}"
+    
+    with open(output_dir / "review.json", 'w', encoding='utf-8') as f:
+        json.dump(queue, f, ensure_ascii=False, indent=2)
+    
+    rows = []
+    for rank, item in enumerate(queue, 1):
+        image = f'<img src="{html.escape(item["image"])}">' if item["image"] else ''
+        texts = html.escape(format_cell_content(item["texts"])) if item["texts"] is not None else ''
+        score = f'{item["score"]:.3f}' if item["score"] is not None else ''
+        reasons = '<br>'.join(html.escape(reason) for reason in item["reasons"])
+        rows.append(f'<tr><td>{rank}</td><td>{item["cell"]}</td><td>{image}</td><td>{texts}</td>'
+                    f'<td>{score}</td><td>{reasons}</td></tr>')
+    with open(output_dir / "review.html", 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>复核队列</title>'
+                '<style>table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:4px}</style></head><body>\n'
+                '<table>\n<tr><th>#</th><th>单元格</th><th>图片</th><th>识别内容</th><th>置信度</th><th>原因</th></tr>\n'
+                + '\n'.join(rows) + '\n</table>\n</body></html>\n')
+
+
 def main():
     """主函数"""
     args = parse_args()
@@ -396,7 +613,18 @@ def main():
         return 1
     
     # 执行检查
-    success = check_json_file(input_path, warnings)
+    success = check_json_file(input_path, warnings, args.penalty)
+    
+    # 生成复核队列，校验失败时也生成，便于按队列逐个修正
+    if success and args.review:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            input_data = json.load(f)
+        if not input_data.get('scores'):
+            print("警告: 识别结果中没有置信度，复核队列只包含违反校验规则的单元格")
+        detection_data = load_detection_data(args.detection) if args.detection else None
+        queue = build_review_queue(input_data, args.min_score, args.penalty)
+        save_review_queue(queue, args.review, detection_data, args.detection)
+        print(f"复核队列共 {len(queue)} 个单元格，已保存到: {Path(args.review) / 'review.html'}")
     
     # 输出检查结果
     if warnings:
@@ -432,7 +660,7 @@ def main():
                 json.dump(output_data, f, ensure_ascii=False, indent=2)
             
             print(f"数据转换完成，结果已保存到: {output_path}")
-            print(f"请手动填充题目 FB、official、markers 和 series 奖牌配置数据。")
+            print(f"请手动填充或核对题目 FB，并填充 official、markers 和 series 奖牌配置数据。")
             
         except Exception as e:
             print(f"数据转换失败: {e}")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import time
+from detect import load_image, detect_table_regions, save_detection_results
+from lazy import lazy_import
+np = lazy_import('numpy')
+
+# 行签名哈希使用的随机权重与多行组合的乘数，固定种子保证结果可复现
+HASH_SEED = 20240601
+GRAM_MULTIPLIER = 0x9E3779B97F4A7C15
+# 计算行签名时每块转换为 uint64 的字节数上限，整图一次性转换会占用原图 8 倍的内存
+SIGNATURE_CHUNK_BYTES = 1 << 25
+
+def row_signatures(img):
+    """
+    计算每一行像素的签名（64 位哈希）
+    :param img: RGB图像
+    :return: uint64 数组，长度为图像高度
+    """
+    rows = img.reshape(img.shape[0], -1)
+    weights = np.random.default_rng(HASH_SEED).integers(1, 2 ** 63, rows.shape[1], dtype=np.uint64) | np.uint64(1)
+    # 按行分块计算，每块的像素提升为 uint64 后不超过 SIGNATURE_CHUNK_BYTES；uint64 乘加自然按 2^64 取模
+    chunk = max(1, SIGNATURE_CHUNK_BYTES // (8 * max(rows.shape[1], 1)))
+    signatures = np.empty(rows.shape[0], dtype=np.uint64)
+    for start in range(0, rows.shape[0], chunk):
+        signatures[start:start + chunk] = rows[start:start + chunk] @ weights
+    return signatures
+
+def gram_signatures(signatures, k):
+    """
+    将连续 k 行的签名组合为一个签名，降低空白行等重复行造成的误匹配
+    :param signatures: 行签名数组
+    :param k: 组合的行数
+    :return: uint64 数组，第 i 项对应第 i 行开始的 k 行
+    """
+    n = len(signatures) - k + 1
+    grams = np.zeros(max(n, 0), dtype=np.uint64)
+    for t in range(k):
+        grams = grams * np.uint64(GRAM_MULTIPLIER) + signatures[t:t + n]
+    return grams
+
+def find_overlap(prev_signatures, next_signatures, gram=16, anchors=8, min_match=0.9):
+    """
+    查找相邻两张截图的纵向重叠行数
+    :param prev_signatures: 上一张截图的行签名
+    :param next_signatures: 下一张截图的行签名
+    :param gram: 定位候选偏移时组合的行数
+    :param anchors: 下一张截图开头用于定位的锚点个数，部分锚点被滚动条等遮挡时仍能定位
+    :param min_match: 重叠部分签名一致的行比例阈值（容忍滚动条等少量差异）
+    :return: 重叠行数，未找到时为 0
+    """
+    prev_height = len(prev_signatures)
+    next_height = len(next_signatures)
+    k = min(gram, prev_height, next_height)
+    if k == 0:
+        return 0
+
+    # 下一张截图开头每隔 k 行取一个锚点，用锚点处 k 行的组合签名在上一张截图中定位候选偏移
+    prev_grams = gram_signatures(prev_signatures, k)
+    next_grams = gram_signatures(next_signatures[:anchors * k + k - 1], k)
+    offsets = []
+    for j in range(0, len(next_grams), k):
+        offsets.append(np.flatnonzero(prev_grams == next_grams[j]) - j)
+    offsets = np.unique(np.concatenate(offsets))
+    offsets = offsets[(offsets >= 0) & (prev_height - offsets <= next_height)]
+
+    # 偏移从小到大即重叠从大到小，取第一个满足阈值的偏移
+    for offset in offsets:
+        overlap = prev_height - offset
+        if np.mean(prev_signatures[offset:] == next_signatures[:overlap]) >= min_match:
+            return int(overlap)
+
+    # 重叠不足 k 行时直接逐个比较
+    for overlap in range(k - 1, 0, -1):
+        if np.array_equal(prev_signatures[-overlap:], next_signatures[:overlap]):
+            return overlap
+    return 0
+
+def stitch_images(images, skip_top=0, gram=16, anchors=8, min_match=0.9):
+    """
+    将按滚动顺序截取的多张截图拼接为一张完整图片
+    :param images: 图片路径、.npy 文件路径或RGB图像数组的列表，按从上到下的顺序
+    :param skip_top: 除第一张外每张截图顶部跳过的像素行数（如固定的导航栏、表头）
+    :param gram: 定位候选偏移时组合的行数
+    :param anchors: 定位时使用的锚点个数
+    :param min_match: 重叠部分签名一致的行比例阈值
+    :return: 拼接后的RGB图像数组
+    """
+    if not images:
+        raise ValueError("没有需要拼接的截图")
+
+    segments = []
+    prev_signatures = None
+    width = None
+    for i, image in enumerate(images):
+        img = load_image(image)
+        if i > 0:
+            img = img[skip_top:]
+        if width is None:
+            width = img.shape[1]
+        elif img.shape[1] != width:
+            raise ValueError(f"第 {i + 1} 张截图宽度 {img.shape[1]} 与第一张截图宽度 {width} 不一致")
+
+        signatures = row_signatures(img)
+        overlap = 0
+        if prev_signatures is not None:
+            overlap = find_overlap(prev_signatures, signatures, gram, anchors, min_match)
+            if overlap == 0:
+                print(f"警告: 第 {i} 张与第 {i + 1} 张截图之间没有找到重叠部分，将直接拼接")
+            print(f"第 {i + 1} 张截图: 高度 {img.shape[0]}, 与上一张重叠 {overlap} 行")
+        else:
+            print(f"第 {i + 1} 张截图: 高度 {img.shape[0]}")
+
+        # 丢弃与上一张重叠的行
+        segments.append(img[overlap:])
+        prev_signatures = signatures
+
+    stitched = np.concatenate(segments, axis=0)
+    print(f"拼接完成: {stitched.shape[1]} x {stitched.shape[0]}")
+    return stitched
+
+def save_image(path, img):
+    """
+    保存拼接结果，.npy 后缀保存为RGB数组（可供 detect.py 以 mmap 方式分块处理），其余按图片格式保存
+    :param path: 保存路径
+    :param img: RGB图像
+    """
+    import cv2
+    if str(path).endswith('.npy'):
+        np.save(path, img)
+    elif not cv2.imwrite(str(path), cv2.cvtColor(img, cv2.COLOR_RGB2BGR)):
+        raise ValueError(f"无法保存图片: {path}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='拼接按滚动顺序截取的榜单截图',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        'images',
+        type=str,
+        nargs='+',
+        help='按从上到下顺序排列的截图路径'
+    )
+
+    parser.add_argument(
+        '--skip-top',
+        type=int,
+        default=0,
+        help='除第一张外每张截图顶部跳过的像素行数（如固定的导航栏、表头）'
+    )
+
+    parser.add_argument(
+        '--min-match',
+        type=float,
+        default=0.9,
+        help='重叠部分签名一致的行比例阈值'
+    )
+
+    parser.add_argument(
+        '-o', '--output',
+        type=str,
+        default='ranklist.png',
+        help='拼接结果保存路径，.npy 后缀保存为RGB数组'
+    )
+
+    parser.add_argument(
+        '--detect',
+        type=str,
+        help='拼接后直接检测表格区域，并将检测结果保存到指定目录'
+    )
+
+    args = parser.parse_args()
+
+    for image in args.images:
+        if not os.path.exists(image):
+            parser.error(f"输入图片路径 '{image}' 不存在")
+
+    return args
+
+def main():
+    start_time = time.time()
+    args = parse_args()
+
+    print("=" * 50)
+    print("截图拼接开始")
+    print("=" * 50)
+
+    stitched = stitch_images(args.images, args.skip_top, min_match=args.min_match)
+    save_image(args.output, stitched)
+    print(f"拼接结果已保存到 {args.output}")
+
+    if args.detect:
+        print("\n检测表格区域")
+        regions = detect_table_regions(stitched)
+        save_detection_results(stitched, regions, args.detect)
+        print(f"检测结果已保存到 {args.detect} 目录")
+
+    print(f"\n总耗时: {time.time() - start_time:.3f}")
+
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import random
+from pathlib import Path
+from srk import convert_row
+from verdict import VERDICT_COLORS
+from lazy import lazy_import
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# 可选的字体，使用 OpenCV 自带的 Hershey 字体，不依赖系统字体文件；值为 cv2 中的常量名，使用时才导入 cv2
+FONTS = {
+    'simplex': 'FONT_HERSHEY_SIMPLEX',
+    'duplex': 'FONT_HERSHEY_DUPLEX',
+    'complex': 'FONT_HERSHEY_COMPLEX',
+    'triplex': 'FONT_HERSHEY_TRIPLEX',
+    'plain': 'FONT_HERSHEY_PLAIN',
+}
+
+# 题目气球颜色（RGB），按题目顺序循环使用；不使用灰色，避免被检测为分隔线
+PROBLEM_COLORS = [
+    (255, 0, 0), (0, 128, 255), (255, 215, 0), (0, 200, 0), (255, 105, 180), (128, 0, 128),
+    (255, 140, 0), (0, 206, 209), (139, 69, 19), (0, 0, 139), (154, 205, 50), (70, 130, 180),
+]
+
+# 队名和学校名使用的词
+TEAM_WORDS = ['Alpha', 'Beta', 'Gamma', 'Delta', 'Sigma', 'Omega', 'Orange', 'Cactus', 'Rocket', 'Pixel', 'Lambda',
+              'Kernel', 'Vector', 'Matrix', 'Binary', 'Quasar', 'Nebula', 'Falcon', 'Tiger', 'Panda']
+SCHOOL_WORDS = ['North', 'South', 'East', 'West', 'Central', 'Lake', 'River', 'Mountain', 'Ocean', 'Forest']
+SCHOOL_TYPES = ['University', 'Institute of Technology', 'Normal University', 'College']
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='生成 DOMjudge 风格的合成榜单截图，同时保存真实的识别结果和 srk，用于测试和性能测试',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-o', '--output', required=True, help='输出目录，每张榜单保存为 <名称>.png、<名称>.result.json 和 <名称>.srk.json')
+    parser.add_argument('-n', '--boards', type=int, default=1, help='生成的榜单数量')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子，第 i 张榜单使用 seed + i')
+    add_render_args(parser)
+    return parser.parse_args()
+
+
+def add_render_args(parser):
+    """添加生成榜单的参数，benchmark.py 共用"""
+    parser.add_argument('--teams', type=int, default=50, help='每张榜单的队伍数量')
+    parser.add_argument('--problems', type=int, default=12, help='题目数量，最多 26')
+    parser.add_argument('--font', choices=FONTS, default='simplex', help='字体')
+    parser.add_argument('--font-scale', type=float, default=0.5, help='字号（OpenCV 字体缩放系数）')
+    parser.add_argument('--scale', type=float, default=1.0, help='整体缩放比例，模拟不同的屏幕缩放')
+    parser.add_argument('--color-jitter', type=int, default=0, help='状态颜色每个通道的随机偏移上限，模拟不同的配色')
+    parser.add_argument('--noise', type=float, default=0.0, help='高斯亮度噪声的标准差')
+    parser.add_argument('--jpeg-quality', type=int, default=0, help='按指定质量压缩为 JPEG 后再解码，0 表示不压缩')
+
+
+def render_options(args):
+    """从命令行参数中取出 render_board 的参数"""
+    return {
+        'font': args.font,
+        'font_scale': args.font_scale,
+        'scale': args.scale,
+        'color_jitter': args.color_jitter,
+        'noise': args.noise,
+        'jpeg_quality': args.jpeg_quality,
+    }
+
+
+def tries_text(tries):
+    return f"{tries} try" if tries == 1 else f"{tries} tries"
+
+
+def generate_board(teams=50, problems=12, seed=0, duration=300, freeze=240, penalty=20, pending_ratio=0.3):
+    """
+    随机生成一张榜单的数据，排名、解题数和罚时与各题状态一致
+    :param teams: 队伍数量
+    :param problems: 题目数量
+    :param seed: 随机种子
+    :param duration: 比赛时长（分钟）
+    :param freeze: 封榜时间（分钟），封榜后的提交按比例显示为待定
+    :param penalty: 每次错误提交的罚时（分钟）
+    :param pending_ratio: 封榜后提交显示为待定的比例
+    :return: 识别结果格式的数据 {"header", "body", "verdicts", "problem_colors"}，body 中空单元格为 []
+    """
+    if not 1 <= problems <= 26:
+        raise ValueError(f"题目数量应在 1 到 26 之间，当前为 {problems}")
+    rng = random.Random(seed)
+    difficulty = [rng.uniform(0.05, 0.95) for _ in range(problems)]
+
+    rows = []
+    for team in range(teams):
+        name = f"{rng.choice(TEAM_WORDS)} {rng.choice(TEAM_WORDS)} {team + 1}"
+        school = f"{rng.choice(SCHOOL_WORDS)} {rng.choice(SCHOOL_TYPES)}"
+        strength = rng.uniform(0.2, 1.0)
+        statuses = []
+        for p in range(problems):
+            r = rng.random()
+            tries = 1 + min(int(rng.expovariate(1.5)), 15)
+            if r < difficulty[p] * strength:
+                time = rng.randint(1, duration - 1)
+                verdict = '?' if time >= freeze and rng.random() < pending_ratio else 'AC'
+                statuses.append((verdict, time, tries))
+            elif r < difficulty[p] * strength + 0.15:
+                statuses.append(('RJ', None, tries))
+            else:
+                statuses.append(('', None, 0))
+        solved = sum(1 for verdict, _, _ in statuses if verdict == 'AC')
+        penalty_time = sum(time + penalty * (tries - 1) for verdict, time, tries in statuses if verdict == 'AC')
+        rows.append((solved, penalty_time, name, school, statuses))
+    rows.sort(key=lambda row: (-row[0], row[1]))
+
+    # 每题最早通过的队伍为一血
+    for p in range(problems):
+        solves = [(row[4][p][1], i) for i, row in enumerate(rows) if row[4][p][0] == 'AC']
+        if solves:
+            _, i = min(solves)
+            _, time, tries = rows[i][4][p]
+            rows[i][4][p] = ('FB', time, tries)
+
+    body = []
+    verdicts = []
+    for solved, penalty_time, name, school, statuses in rows:
+        cells = [[name, school], [str(solved), str(penalty_time)]]
+        for verdict, time, tries in statuses:
+            if verdict in ('AC', 'FB'):
+                cells.append([str(time), tries_text(tries)])
+            elif verdict:
+                cells.append([tries_text(tries)])
+            else:
+                cells.append([])
+        body.append(cells)
+        verdicts.append([None, None] + [verdict for verdict, _, _ in statuses])
+    return {
+        "header": [["TEAM"], ["SCORE"]] + [[chr(ord('A') + p)] for p in range(problems)],
+        "body": body,
+        "verdicts": verdicts,
+        "problem_colors": [PROBLEM_COLORS[p % len(PROBLEM_COLORS)] for p in range(problems)],
+    }
+
+
+def board_to_srk(board, title='Synthetic Contest', duration=300, freeze=60):
+    """
+    生成榜单数据对应的 srk，rows 与 srk.convert_row 的转换结果一致
+    :param board: generate_board 生成的数据
+    :param title: 比赛名称
+    :param duration: 比赛时长（分钟）
+    :param freeze: 封榜时长（分钟）
+    :return: srk 数据
+    """
+    problems = [{
+        "alias": cell[0],
+        "style": {"backgroundColor": f"rgb({r}, {g}, {b})"}
+    } for cell, (r, g, b) in zip(board['header'][2:], board['problem_colors'])]
+    rows = [convert_row(row, verdicts) for row, verdicts in zip(board['body'], board['verdicts'])]
+    return {
+        "type": "general",
+        "version": "0.2.3",
+        "contest": {
+            "title": title,
+            "startAt": "2024-01-01T09:00:00+08:00",
+            "duration": [duration, "min"],
+            "frozenDuration": [freeze, "min"],
+        },
+        "problems": problems,
+        "series": [],
+        "rows": rows,
+        "sorter": {"algorithm": "ICPC", "config": {"penalty": [20, "min"]}},
+    }
+
+
+def render_board(board, font='simplex', font_scale=0.5, scale=1.0, color_jitter=0, noise=0.0, jpeg_quality=0,
+                 seed=0, line_color=(204, 204, 204)):
+    """
+    按 DOMjudge 榜单的样式渲染榜单截图，裁剪范围与 README 中 Step 0 的要求一致（从队伍列开始，截止到最后一个题目列）
+    :param board: generate_board 生成的数据
+    :param font: 字体名称，见 FONTS
+    :param font_scale: 字号
+    :param scale: 整体缩放比例
+    :param color_jitter: 状态颜色每个通道的随机偏移上限
+    :param noise: 高斯亮度噪声的标准差
+    :param jpeg_quality: JPEG 压缩质量，0 表示不压缩
+    :param seed: 颜色偏移和噪声的随机种子
+    :param line_color: 分隔线颜色（RGB）
+    :return: RGB图像
+    """
+    rng = np.random.default_rng(seed)
+    face = getattr(cv2, FONTS[font])
+    size = font_scale * scale
+    thickness = max(1, round(scale))
+    line = max(1, round(scale))
+    pad = round(8 * scale)
+
+    def text_size(text, text_scale=size):
+        (width, height), baseline = cv2.getTextSize(text, face, text_scale, thickness)
+        return width, height, baseline
+
+    # 按最长的文本确定列宽和行高
+    small = size * 0.8
+    team_width = max(max(text_size(row[0][0])[0], text_size(row[0][1], small)[0]) for row in board['body'])
+    team_width = max(team_width, text_size('TEAM')[0]) + 2 * pad
+    score_width = max(text_size('SCORE')[0], text_size('9999')[0]) + 2 * pad
+    problem_width = max(text_size('299')[0], text_size('15 tries', small)[0]) + 2 * pad
+    line_height = text_size('0123456789tries')[1] + text_size('0123456789tries')[2]
+    header_height = line_height + 2 * pad
+    row_height = 2 * line_height + 3 * pad // 2
+    widths = [team_width, score_width] + [problem_width] * (len(board['header']) - 2)
+
+    xs = [line]
+    for width in widths:
+        xs.append(xs[-1] + width + line)
+    height = header_height + line + len(board['body']) * (row_height + line)
+    img = np.full((height, xs[-1], 3), 255, dtype=np.uint8)
+    colors = {verdict: tuple(int(np.clip(c + rng.integers(-color_jitter, color_jitter + 1), 0, 255)) for c in color)
+              for verdict, color in VERDICT_COLORS.items()}
+
+    def put(text, x, y, cell_width, text_scale=size, color=(0, 0, 0), center=False):
+        width, _, _ = text_size(text, text_scale)
+        x = x + (cell_width - width) // 2 if center else x + pad
+        cv2.putText(img, text, (x, y), face, text_scale, color, thickness, cv2.LINE_AA)
+
+    # 表头：题目单元格填充气球颜色，单元格之间有竖直分隔线
+    baseline_y = header_height - pad - text_size('A')[2]
+    # xs[i] 为第 i 列的左边界，第 i 列之后的分隔线占 [xs[i + 1] - line, xs[i + 1])
+    for col, (x0, width) in enumerate(zip(xs, widths)):
+        if col >= 2:
+            color = board['problem_colors'][col - 2]
+            img[0:header_height, x0 + 1:x0 + width - 1] = color
+            text_color = (0, 0, 0) if sum(color) > 380 else (255, 255, 255)
+            put(board['header'][col][0], x0, baseline_y, width, color=text_color, center=True)
+        else:
+            put(board['header'][col][0], x0, baseline_y, width)
+    for x in xs:
+        img[0:header_height, x - line:x] = line_color
+
+    # 表格主体：行之间有水平分隔线，状态单元格按结果填充背景色
+    y = header_height
+    for row, verdicts in zip(board['body'], board['verdicts']):
+        img[y:y + line] = line_color
+        y0 = y + line
+        first_y = y0 + pad // 2 + line_height - text_size('0')[2]
+        second_y = first_y + line_height + pad // 2
+        for col, (x0, width) in enumerate(zip(xs, widths)):
+            cell = row[col]
+            if col == 0:
+                put(cell[0], x0, first_y, width)
+                put(cell[1], x0, second_y, width, small, (90, 90, 90))
+            elif col == 1:
+                put(cell[0], x0, first_y, width, center=True)
+                put(cell[1], x0, second_y, width, center=True)
+            elif cell:
+                img[y0 + 2:y0 + row_height - 2, x0 + 2:x0 + width - 2] = colors[verdicts[col]]
+                if len(cell) == 2:
+                    put(cell[0], x0, first_y, width, center=True)
+                put(cell[-1], x0, second_y, width, small, center=True)
+        y = y0 + row_height
+    img[y:y + line] = line_color
+    # 表格左右边框
+    img[:, :line] = line_color
+    img[:, -line:] = line_color
+
+    if noise > 0:
+        # 亮度噪声，三个通道加相同的偏移，灰色的分隔线仍为灰色
+        img = np.clip(img + rng.normal(0, noise, img.shape[:2])[..., None], 0, 255).astype(np.uint8)
+    if jpeg_quality:
+        _, data = cv2.imencode('.jpg', cv2.cvtColor(img, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+        img = cv2.cvtColor(cv2.imdecode(data, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+    return img
+
+
+def save_board(board, img, output_dir, name):
+    """
+    保存榜单截图和真实结果
+    :return: 截图路径
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    image_path = output_dir / f"{name}.png"
+    cv2.imwrite(str(image_path), cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
+    with open(output_dir / f"{name}.result.json", 'w', encoding='utf-8') as f:
+        json.dump({key: board[key] for key in ('header', 'body', 'verdicts')}, f, ensure_ascii=False, indent=2)
+    with open(output_dir / f"{name}.srk.json", 'w', encoding='utf-8') as f:
+        json.dump(board_to_srk(board), f, ensure_ascii=False, indent=2)
+    return image_path
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    try:
+        for i in range(args.boards):
+            seed = args.seed + i
+            board = generate_board(args.teams, args.problems, seed)
+            img = render_board(board, seed=seed, **render_options(args))
+            image_path = save_board(board, img, args.output, f"board_{seed}")
+            print(f"已生成 {image_path}: {img.shape[1]} x {img.shape[0]}，{len(board['body'])} 支队伍")
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
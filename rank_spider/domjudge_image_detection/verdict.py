@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+from lazy import lazy_import
+np = lazy_import('numpy')
+
+# DOMjudge 榜单默认的状态单元格背景色（RGB）：通过、一血、未通过、封榜后待定
+VERDICT_COLORS = {
+    'AC': (96, 231, 96),
+    'FB': (29, 170, 29),
+    'RJ': (232, 114, 114),
+    '?': (102, 102, 255),
+}
+
+# 榜单中第一个题目状态列的索引，前两列为队伍和分数
+FIRST_STATUS_COL = 2
+
+
+def classify_verdicts(images, colors=None, color_threshold=60, min_ratio=0.2, white_threshold=240, white_ratio=0.99,
+                      chunk_pixels=1 << 20):
+    """
+    按背景色判定状态单元格的结果，同一分块内所有单元格的像素一起向量化统计
+    :param images: RGB单元格图像列表
+    :param colors: {结果: RGB颜色}，默认使用 VERDICT_COLORS
+    :param color_threshold: 像素与结果颜色的 L1 距离阈值
+    :param min_ratio: 判定为某个结果时该颜色像素的最小占比
+    :param white_threshold: 白色的阈值
+    :param white_ratio: 判定为空单元格时白色像素的最小占比
+    :param chunk_pixels: 每个分块的像素数上限，限制中间数组的内存占用
+    :return: 每个单元格的判定结果列表，空单元格为 ''，无法判定时为 None
+    """
+    colors = colors or VERDICT_COLORS
+    verdicts = list(colors)
+    palette = np.array([colors[v] for v in verdicts], dtype=np.int16)
+
+    result = []
+    start = 0
+    while start < len(images):
+        end = start + 1
+        total = images[start].shape[0] * images[start].shape[1]
+        while end < len(images) and total + images[end].shape[0] * images[end].shape[1] <= chunk_pixels:
+            total += images[end].shape[0] * images[end].shape[1]
+            end += 1
+        ratios = _color_ratios(images[start:end], palette, color_threshold, white_threshold)
+        for cell_ratios in ratios:
+            best = int(cell_ratios[:len(verdicts)].argmax())
+            if cell_ratios[best] >= min_ratio:
+                result.append(verdicts[best])
+            elif cell_ratios[-1] >= white_ratio:
+                result.append('')
+            else:
+                result.append(None)
+        start = end
+    return result
+
+
+def _color_ratios(images, palette, color_threshold, white_threshold):
+    """
+    统计每个单元格中各结果颜色、其他颜色和白色像素的占比
+    :return: 形状为 (单元格数, 结果数 + 2) 的数组，最后两列为其他颜色和白色
+    """
+    sizes = np.array([img.shape[0] * img.shape[1] for img in images])
+    pixels = np.concatenate([img.reshape(-1, 3) for img in images]).astype(np.int16)
+    cell_ids = np.repeat(np.arange(len(images)), sizes)
+
+    # 每个像素归入最近的结果颜色，距离超过阈值的归入其他颜色，白色像素单独统计
+    distances = np.abs(pixels[:, None, :] - palette[None, :, :]).sum(axis=2)
+    labels = distances.argmin(axis=1)
+    labels[distances.min(axis=1) > color_threshold] = len(palette)
+    labels[(pixels >= white_threshold).all(axis=1)] = len(palette) + 1
+    counts = np.bincount(cell_ids * (len(palette) + 2) + labels, minlength=len(images) * (len(palette) + 2))
+    return counts.reshape(len(images), -1) / np.maximum(sizes, 1)[:, None]
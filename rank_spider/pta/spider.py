@@ -4,6 +4,12 @@ import time
 import shutil
 import sqlite3
 import requests
+import os
+import sys
+
+# 增量榜单模块在上一级目录中，与其他爬虫共用
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from srk_delta import RankingDelta
 
 status = {
     'ACCEPTED': 'AC',
@@ -39,6 +45,10 @@ def main():
     calculation = Calculation(config['contest'], db)
 
     submit_id = config['spider']['submit_id']
+    # 增量榜单：每次轮询的 ranking 带上序号 _seq，并额外输出一份相对上一次 ranking 的 JSON Patch
+    # 序号从已有的 ranking 文件继续，重启后客户端持有的 ranking 仍可作为增量的基准
+    delta_path = config.get('delta_path')
+    delta = RankingDelta.load(config['ranking_path']) if delta_path is not None else None
     while True:
         submissions, timestamp = spider.crawl(submit_id)
         scroll_data, sid = calculation.scroll(submissions)
@@ -47,6 +57,8 @@ def main():
 
         dump_info(config['scroll_path'], scroll_data)
         rank_data = calculation.ranking(timestamp)
+        if delta is not None:
+            dump_info(delta_path, delta.update(rank_data))
         dump_info(config['ranking_path'], rank_data)
         if calculation.start_timestamp + config['contest']['duration'] * 60 * 60 < timestamp:
             print("比赛已结束，感谢使用")
@@ -18,6 +18,15 @@ SR_CompilationError = 'CE'
 SR_UnknownError = 'UKE'
 SR_Frozen = '?'
 
+# 校验使用的合法取值，模块加载时构建一次
+_VALID_RESULTS = {
+    SR_FirstBlood, SR_Accepted, SR_Rejected, SR_WrongAnswer, SR_PresentationError, SR_TimeLimitExceeded,
+    SR_MemoryLimitExceeded, SR_OutputLimitExceeded, SR_RuntimeError, SR_CompilationError, SR_UnknownError,
+    SR_Frozen, None,
+}
+# 时间单位: 换算为秒的倍数
+_TIME_UNITS = {'ms': 0.001, 's': 1, 'min': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
 # 颜色格式简写，也支持 HEX 格式：#FFFFFF、RGB 格式：rgb(255, 255, 255)、RGBA 格式：rgba(255, 255, 255, 0.75)
 Style_Gold = 'gold'
 Style_Silver = 'silver'
@@ -198,13 +207,14 @@ class Row:
 
 
 class Rank:
-    def __init__(self, contest: Contest, problems: List[Problem], series: List[Series], rows: List[Row], markers: List[Marker] = None, contributors: List[str] = None) -> None:
+    def __init__(self, contest: Contest, problems: List[Problem], series: List[Series], rows: List[Row], markers: List[Marker] = None, contributors: List[str] = None, check: bool = True) -> None:
         '''
             contest: 比赛基础信息
             problems: 题目列表
             series: 排名
             rows: 做题记录
             markers: 特殊队伍标记
+            check: 是否进行参数校验，校验失败时抛出 ValueError，疑似问题（如时间单位可能写错）记录在 warnings 中【可选】
         '''
         self.contest = contest.contest
 
@@ -225,13 +235,56 @@ class Rank:
                 self.markers.append(m.marker)
         self.contributors = contributors
         
-        self.__check()
+        self.warnings = []
+        if check:
+            self.__check()
     
     def __check(self):
         '''
-            TODO: 参数校验
+            参数校验：单次遍历所有行，收集全部问题后统一抛出 ValueError
+            只影响数据可信度、不影响结构的疑似问题记录在 self.warnings 中，不抛出异常
         '''
-        pass
+        errors = []
+        num_problems = len(self.problems)
+        num_series = len(self.series)
+        marker_ids = set()
+        if self.markers is not None:
+            marker_ids = {m['id'] for m in self.markers}
+
+        # 提交时间超过比赛时长两倍时，通常是时间单位写错（如毫秒写成了秒），记为疑似问题
+        # statuses 的 time 包含罚时，不做该项检查
+        max_time = None
+        duration = _check_time(self.contest.get('duration'), 'contest.duration', None, errors, self.warnings)
+        if duration and duration > 0:
+            max_time = duration * 2
+
+        for i, p in enumerate(self.problems):
+            if not p.get('alias'):
+                errors.append(f'problems[{i}] 缺少 alias')
+
+        for i, r in enumerate(self.rows):
+            if len(r.ranks) != num_series:
+                errors.append(f'rows[{i}] ranks 数量 {len(r.ranks)} 与 series 数量 {num_series} 不一致')
+            if len(r.statuses) != num_problems:
+                errors.append(f'rows[{i}] statuses 数量 {len(r.statuses)} 与题目数量 {num_problems} 不一致')
+            marker = r.user.get('marker')
+            if marker is not None and marker not in marker_ids:
+                errors.append(f'rows[{i}].user.marker 中的 {marker} 不存在于 markers')
+            _check_time(r.score.get('time'), f'rows[{i}].score.time', None, errors, self.warnings)
+            for j, status in enumerate(r.statuses):
+                if status['result'] not in _VALID_RESULTS:
+                    errors.append(f'rows[{i}].statuses[{j}].result 不合法: {status["result"]}')
+                _check_time(status['time'], f'rows[{i}].statuses[{j}].time', None, errors, self.warnings)
+                tries = status.get('tries', 0)
+                if type(tries) is not int or tries < 0:
+                    errors.append(f'rows[{i}].statuses[{j}].tries 不合法: {tries}')
+                for k, solution in enumerate(status.get('solutions') or []):
+                    if solution['result'] not in _VALID_RESULTS:
+                        errors.append(f'rows[{i}].statuses[{j}].solutions[{k}].result 不合法: {solution["result"]}')
+                    _check_time(solution['time'], f'rows[{i}].statuses[{j}].solutions[{k}].time', max_time, errors, self.warnings)
+
+        if errors:
+            raise ValueError(f'榜单参数校验失败，共 {len(errors)} 个问题：\n' + '\n'.join(errors))
 
     def __transform_rows(self) -> List[Any]:
         rows = []
@@ -266,6 +319,29 @@ class Rank:
         return json.dumps(self.result(), ensure_ascii=ensure_ascii)
 
 
+def _check_time(value: Any, name: str, max_time: float, errors: List[str], warnings: List[str]) -> float:
+    '''
+        校验 [数值, 单位] 格式的时间，返回换算后的秒数，不合法时返回 None
+        格式错误记入 errors；负数时间（比赛开始前的提交）和远超比赛时长的时间只是疑似问题，记入 warnings
+    '''
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        errors.append(f'{name} 格式不合法: {value}')
+        return None
+    t, unit = value
+    if unit not in _TIME_UNITS:
+        errors.append(f'{name} 时间单位不合法: {unit}')
+        return None
+    if type(t) not in (int, float):
+        errors.append(f'{name} 时间数值不合法: {t}')
+        return None
+    if t < 0:
+        warnings.append(f'{name} 时间 {value} 为负数，提交早于比赛开始')
+    seconds = t * _TIME_UNITS[unit]
+    if max_time is not None and seconds > max_time:
+        warnings.append(f'{name} 时间 {value} 远超比赛时长，请检查时间单位')
+    return seconds
+
+
 def main():
     contest = Contest('contest 2022', 1666511976, 5, 1)
     problems = [Problem('A', (5, 20)), Problem('B', (1, 10))]
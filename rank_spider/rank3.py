@@ -19,6 +19,15 @@ SR_UnknownError = 'UKE'
 SR_Frozen = '?'
 SR_NoOutput = 'NOUT'
 
+# 校验使用的合法取值，模块加载时构建一次
+_VALID_RESULTS = {
+    SR_FirstBlood, SR_Accepted, SR_Rejected, SR_WrongAnswer, SR_PresentationError, SR_TimeLimitExceeded,
+    SR_MemoryLimitExceeded, SR_OutputLimitExceeded, SR_RuntimeError, SR_CompilationError, SR_UnknownError,
+    SR_Frozen, SR_NoOutput, None,
+}
+# 时间单位: 换算为秒的倍数
+_TIME_UNITS = {'ms': 0.001, 's': 1, 'min': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
 # 颜色格式简写，也支持 HEX 格式：#FFFFFF、RGB 格式：rgb(255, 255, 255)、RGBA 格式：rgba(255, 255, 255, 0.75)
 Style_Gold = 'gold'
 Style_Silver = 'silver'
@@ -213,13 +222,14 @@ class Row:
 
 
 class Rank:
-    def __init__(self, contest: Contest, problems: List[Problem], series: List[Series], rows: List[Row], markers: List[Marker] = None, contributors: List[str] = None, penaltyTimeCalculation = 'min', isRemarks = False ) -> None:
+    def __init__(self, contest: Contest, problems: List[Problem], series: List[Series], rows: List[Row], markers: List[Marker] = None, contributors: List[str] = None, penaltyTimeCalculation = 'min', isRemarks = False, check: bool = True) -> None:
         '''
             contest: 比赛基础信息
             problems: 题目列表
             series: 排名
             rows: 做题记录
             markers: 特殊队伍标记
+            check: 是否进行参数校验，校验失败时抛出 ValueError，疑似问题（如时间单位可能写错）记录在 warnings 中【可选】
         '''
         self.contest = contest.contest
 
@@ -256,13 +266,52 @@ class Rank:
         self.contributors = contributors
         self.penaltyTimeCalculation = penaltyTimeCalculation
         self.isRemarks = isRemarks
-        self.__check()
+        self.warnings = []
+        if check:
+            self.__check()
     
     def __check(self):
         '''
-            TODO: 参数校验
+            参数校验：单次遍历所有行，收集全部问题后统一抛出 ValueError
+            只影响数据可信度、不影响结构的疑似问题记录在 self.warnings 中，不抛出异常
         '''
-        pass
+        errors = []
+        num_problems = len(self.problems)
+        marker_ids = set()
+        if self.markers is not None:
+            marker_ids = {m['id'] for m in self.markers}
+
+        # 时间超过比赛时长两倍时，通常是时间单位写错（如毫秒写成了秒），记为疑似问题
+        max_time = None
+        duration = _check_time(self.contest.get('duration'), 'contest.duration', None, errors, self.warnings)
+        if duration and duration > 0:
+            max_time = duration * 2
+
+        for i, p in enumerate(self.problems):
+            if not p.get('alias'):
+                errors.append(f'problems[{i}] 缺少 alias')
+
+        for i, r in enumerate(self.rows):
+            if len(r.statuses) != num_problems:
+                errors.append(f'rows[{i}] statuses 数量 {len(r.statuses)} 与题目数量 {num_problems} 不一致')
+            for m in r.user.get('markers', []):
+                if m not in marker_ids:
+                    errors.append(f'rows[{i}].user.markers 中的 {m} 不存在于 markers')
+            _check_time(r.score.get('time'), f'rows[{i}].score.time', None, errors, self.warnings)
+            for j, status in enumerate(r.statuses):
+                if status['result'] not in _VALID_RESULTS:
+                    errors.append(f'rows[{i}].statuses[{j}].result 不合法: {status["result"]}')
+                _check_time(status['time'], f'rows[{i}].statuses[{j}].time', max_time, errors, self.warnings)
+                tries = status.get('tries', 0)
+                if type(tries) is not int or tries < 0:
+                    errors.append(f'rows[{i}].statuses[{j}].tries 不合法: {tries}')
+                for k, solution in enumerate(status.get('solutions') or []):
+                    if solution['result'] not in _VALID_RESULTS:
+                        errors.append(f'rows[{i}].statuses[{j}].solutions[{k}].result 不合法: {solution["result"]}')
+                    _check_time(solution['time'], f'rows[{i}].statuses[{j}].solutions[{k}].time', max_time, errors, self.warnings)
+
+        if errors:
+            raise ValueError(f'榜单参数校验失败，共 {len(errors)} 个问题：\n' + '\n'.join(errors))
 
     def __transform_rows(self) -> List[Any]:
         rows = []
@@ -321,6 +370,153 @@ class Rank:
     def to_str(self, ensure_ascii=True) -> str:
         return json.dumps(self.result(), ensure_ascii=ensure_ascii)
 
+    def to_binary(self) -> bytes:
+        '''
+            导出紧凑的二进制格式，可通过 from_binary 无损还原为 srk 结构
+        '''
+        return to_binary(self.result())
+
+
+def _check_time(value: Any, name: str, max_time: float, errors: List[str], warnings: List[str]) -> float:
+    '''
+        校验 [数值, 单位] 格式的时间，返回换算后的秒数，不合法时返回 None
+        格式错误记入 errors；负数时间（比赛开始前的提交）和远超比赛时长的时间只是疑似问题，记入 warnings
+    '''
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        errors.append(f'{name} 格式不合法: {value}')
+        return None
+    t, unit = value
+    if unit not in _TIME_UNITS:
+        errors.append(f'{name} 时间单位不合法: {unit}')
+        return None
+    if type(t) not in (int, float):
+        errors.append(f'{name} 时间数值不合法: {t}')
+        return None
+    if t < 0:
+        warnings.append(f'{name} 时间 {value} 为负数，提交早于比赛开始')
+    seconds = t * _TIME_UNITS[unit]
+    if max_time is not None and seconds > max_time:
+        warnings.append(f'{name} 时间 {value} 远超比赛时长，请检查时间单位')
+    return seconds
+
+
+# 二进制 srk 格式：MessagePack 编码的 [魔数, 版本, 字符串表, 数据]
+# 数据中长度不小于 3 的字符串（包括字典的键）替换为字符串表下标的引用，
+# 提交记录 solutions 打包为 [时间单位, 结果列表, 时间差分列表]
+BINARY_MAGIC = 'srkb'
+BINARY_VERSION = 1
+_EXT_STRING_REF = 1
+_EXT_PACKED_SOLUTIONS = 2
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError('二进制格式需要安装 msgpack：pip install msgpack')
+    return msgpack
+
+
+class _BinaryEncoder:
+    def __init__(self, msgpack) -> None:
+        self.msgpack = msgpack
+        self.strings = []
+        self.index = {}
+
+    def ref(self, s: str) -> Any:
+        if len(s) < 3:
+            return s
+        i = self.index.get(s)
+        if i is None:
+            i = len(self.strings)
+            self.index[s] = i
+            self.strings.append(s)
+        if i < 0x100:
+            data = i.to_bytes(1, 'big')
+        elif i < 0x10000:
+            data = i.to_bytes(2, 'big')
+        else:
+            data = i.to_bytes(4, 'big')
+        return self.msgpack.ExtType(_EXT_STRING_REF, data)
+
+    def encode(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self.ref(value)
+        if isinstance(value, (list, tuple)):
+            return [self.encode(v) for v in value]
+        if isinstance(value, dict):
+            d = {}
+            for k, v in value.items():
+                if k == 'solutions' and _is_packable_solutions(v):
+                    d[self.ref(k)] = self.pack_solutions(v)
+                else:
+                    d[self.ref(k)] = self.encode(v)
+            return d
+        return value
+
+    def pack_solutions(self, solutions: List[Dict]) -> Any:
+        results, deltas = [], []
+        last = 0
+        for s in solutions:
+            results.append(self.encode(s['result']))
+            deltas.append(s['time'][0] - last)
+            last = s['time'][0]
+        data = self.msgpack.packb([self.encode(solutions[0]['time'][1]), results, deltas], use_bin_type=True)
+        return self.msgpack.ExtType(_EXT_PACKED_SOLUTIONS, data)
+
+
+def _is_packable_solutions(solutions: Any) -> bool:
+    '''
+        只有结构为 [{'result': ..., 'time': [整数, 单位]}] 且单位一致的 solutions 才会打包，其余原样编码
+    '''
+    if not isinstance(solutions, list) or len(solutions) == 0:
+        return False
+    unit = None
+    for s in solutions:
+        if not isinstance(s, dict) or list(s.keys()) != ['result', 'time']:
+            return False
+        t = s['time']
+        if not isinstance(t, list) or len(t) != 2 or type(t[0]) is not int or not isinstance(t[1], str):
+            return False
+        if unit is not None and t[1] != unit:
+            return False
+        unit = t[1]
+    return True
+
+
+def to_binary(rank: Dict[str, Any]) -> bytes:
+    '''
+        将 srk 结构编码为二进制格式
+    '''
+    msgpack = _import_msgpack()
+    encoder = _BinaryEncoder(msgpack)
+    data = msgpack.packb(encoder.encode(rank), use_bin_type=True)
+    return msgpack.packb([BINARY_MAGIC, BINARY_VERSION, encoder.strings, data], use_bin_type=True)
+
+
+def from_binary(data: bytes) -> Dict[str, Any]:
+    '''
+        将二进制格式还原为 srk 结构
+    '''
+    msgpack = _import_msgpack()
+    magic, version, strings, body = msgpack.unpackb(data, raw=False)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError(f'不支持的二进制 srk 格式: {magic} {version}')
+
+    def ext_hook(code, ext_data):
+        if code == _EXT_STRING_REF:
+            return strings[int.from_bytes(ext_data, 'big')]
+        if code == _EXT_PACKED_SOLUTIONS:
+            unit, results, deltas = msgpack.unpackb(ext_data, raw=False, ext_hook=ext_hook)
+            solutions, t = [], 0
+            for result, delta in zip(results, deltas):
+                t += delta
+                solutions.append({'result': result, 'time': [t, unit]})
+            return solutions
+        return msgpack.ExtType(code, ext_data)
+
+    return msgpack.unpackb(body, raw=False, ext_hook=ext_hook)
+
 
 def main():
     contest = Contest('contest 2022', 1666511976, 5, 1)
@@ -5,6 +5,12 @@ import time
 import shutil
 import sqlite3
 import requests
+import os
+import sys
+
+# 增量榜单模块在上一级目录中，与其他爬虫共用
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from srk_delta import RankingDelta
 
 
 time_format = '%Y-%m-%dT%H:%M:%S.%fZ'
@@ -45,6 +51,10 @@ def main():
     calculation = Calculation(contest_config, db)
 
     solution_id = config['submit_id']
+    # 增量榜单：每次轮询的 ranking 带上序号 _seq，并额外输出一份相对上一次 ranking 的 JSON Patch
+    # 序号从已有的 ranking 文件继续，重启后客户端持有的 ranking 仍可作为增量的基准
+    delta_path = config.get('delta_path')
+    delta = RankingDelta.load(config['ranking_path']) if delta_path is not None else None
     while True:
         solutions, t = spider.get_solution(solution_id=solution_id)
         scroll_data, sid = calculation.scroll(solutions)
@@ -57,6 +67,8 @@ def main():
 
         dump_info(config['scroll_path'], scroll_data)
         rank_data = calculation.ranking(t)
+        if delta is not None:
+            dump_info(delta_path, delta.update(rank_data))
         dump_info(config['ranking_path'], rank_data)
         if contest_config['end_at'] < t:
             print("比赛已结束，感谢使用")
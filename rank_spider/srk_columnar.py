@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+'''
+srk 列式导出
+
+将 rank3.Rank 或已有的 srk 文件展开为 contests、problems、rows、statuses、solutions 五张表，
+每一列保存为一个独立的 .npy 文件，可通过 load() 以 mmap 方式零拷贝读取后进行向量化统计。
+所有字符串统一字典编码到 strings.json，列中保存字符串下标，-1 表示空值；时间统一换算为毫秒。
+
+示例：统计所有比赛中 A 题的通过时间分布
+    t = load('columnar')
+    a = t['strings'].index('A')
+    st = t['statuses']
+    mask = np.isin(st['result'], [t['strings'].index('AC'), t['strings'].index('FB')])
+    times = st['time_ms'][mask & (st['alias'] == a)]
+'''
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+import numpy as np
+
+import rank3
+
+
+TIME_UNITS = {
+    'ms': 1,
+    's': 1000,
+    'min': 60 * 1000,
+    'h': 60 * 60 * 1000,
+    'd': 24 * 60 * 60 * 1000,
+}
+
+# 表名: [(列名, dtype)]
+SCHEMA = {
+    'contests': [
+        ('contest', np.int32),
+        ('title', np.int32),
+        ('source', np.int32),
+        ('start_at', np.int64),  # 秒级时间戳
+        ('duration_ms', np.int64),
+        ('frozen_ms', np.int64),
+        ('problem_count', np.int32),
+        ('row_count', np.int32),
+    ],
+    'problems': [
+        ('contest', np.int32),
+        ('problem', np.int32),
+        ('alias', np.int32),
+        ('accepted', np.int32),  # 无统计数据时为 -1
+        ('submitted', np.int32),
+    ],
+    'rows': [
+        ('contest', np.int32),
+        ('row', np.int32),
+        ('name', np.int32),
+        ('organization', np.int32),
+        ('official', np.int8),  # 未知时为 -1
+        ('score', np.int32),
+        ('score_time_ms', np.int64),
+    ],
+    'statuses': [
+        ('contest', np.int32),
+        ('row', np.int32),
+        ('problem', np.int32),
+        ('alias', np.int32),
+        ('result', np.int32),
+        ('time_ms', np.int64),
+        ('tries', np.int32),
+    ],
+    'solutions': [
+        ('contest', np.int32),
+        ('row', np.int32),
+        ('problem', np.int32),
+        ('result', np.int32),
+        ('time_ms', np.int64),
+    ],
+}
+
+
+def _text(value: Any) -> Any:
+    '''
+        多语言文本取 zh-CN，其次取 fallback
+    '''
+    if isinstance(value, dict):
+        return value.get('zh-CN') or value.get('fallback') or next(iter(value.values()), None)
+    return value
+
+
+def _time_ms(value: Any) -> int:
+    if not isinstance(value, list) or len(value) != 2:
+        return -1
+    return int(round(value[0] * TIME_UNITS[value[1]]))
+
+
+def _timestamp(value: Any) -> int:
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp())
+    if isinstance(value, (int, float)):
+        return int(value)
+    return -1
+
+
+class ColumnarWriter:
+    def __init__(self) -> None:
+        self.strings = []
+        self.index = {}
+        self.columns = {table: {name: [] for name, _ in columns} for table, columns in SCHEMA.items()}
+
+    def ref(self, s: Any) -> int:
+        if s is None:
+            return -1
+        i = self.index.get(s)
+        if i is None:
+            i = len(self.strings)
+            self.index[s] = i
+            self.strings.append(s)
+        return i
+
+    def append(self, table: str, **values) -> None:
+        columns = self.columns[table]
+        for name, column in columns.items():
+            column.append(values[name])
+
+    def add(self, rank: Union[rank3.Rank, Dict[str, Any]], source: str = '') -> None:
+        '''
+            rank: rank3.Rank 实例或 srk 结构
+            source: 数据来源，一般为 srk 文件路径
+        '''
+        if isinstance(rank, rank3.Rank):
+            rank = rank.result()
+        cid = len(self.columns['contests']['contest'])
+        contest = rank['contest']
+        problems = rank.get('problems', [])
+        rows = rank.get('rows', [])
+        self.append('contests',
+                    contest=cid,
+                    title=self.ref(_text(contest.get('title'))),
+                    source=self.ref(source),
+                    start_at=_timestamp(contest.get('startAt')),
+                    duration_ms=_time_ms(contest.get('duration')),
+                    frozen_ms=_time_ms(contest.get('frozenDuration')),
+                    problem_count=len(problems),
+                    row_count=len(rows))
+
+        aliases = []
+        for pi, p in enumerate(problems):
+            aliases.append(self.ref(p.get('alias')))
+            statistics = p.get('statistics', {})
+            self.append('problems',
+                        contest=cid,
+                        problem=pi,
+                        alias=aliases[-1],
+                        accepted=statistics.get('accepted', -1),
+                        submitted=statistics.get('submitted', -1))
+
+        for ri, r in enumerate(rows):
+            user = r['user']
+            official = user.get('official')
+            self.append('rows',
+                        contest=cid,
+                        row=ri,
+                        name=self.ref(_text(user.get('name'))),
+                        organization=self.ref(_text(user.get('organization'))),
+                        official=-1 if official is None else int(official),
+                        score=r['score']['value'],
+                        score_time_ms=_time_ms(r['score'].get('time')))
+            for pi, s in enumerate(r['statuses']):
+                self.append('statuses',
+                            contest=cid,
+                            row=ri,
+                            problem=pi,
+                            alias=aliases[pi] if pi < len(aliases) else -1,
+                            result=self.ref(s.get('result')),
+                            time_ms=_time_ms(s.get('time')),
+                            tries=s.get('tries', 0))
+                for solution in s.get('solutions') or []:
+                    self.append('solutions',
+                                contest=cid,
+                                row=ri,
+                                problem=pi,
+                                result=self.ref(solution.get('result')),
+                                time_ms=_time_ms(solution.get('time')))
+
+    def add_file(self, path: str) -> None:
+        '''
+            导入单个 srk 文件，失败时回滚已写入的部分行，保证各表一致
+        '''
+        sizes = {table: len(next(iter(columns.values()))) for table, columns in self.columns.items()}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.add(json.load(f), str(path))
+        except Exception:
+            for table, columns in self.columns.items():
+                for column in columns.values():
+                    del column[sizes[table]:]
+            raise
+
+    def save(self, output_dir: str) -> None:
+        output = Path(output_dir)
+        for table, columns in SCHEMA.items():
+            table_dir = output / table
+            table_dir.mkdir(parents=True, exist_ok=True)
+            for name, dtype in columns:
+                np.save(table_dir / f'{name}.npy', np.asarray(self.columns[table][name], dtype=dtype))
+        with open(output / 'strings.json', 'w', encoding='utf-8') as f:
+            json.dump(self.strings, f, ensure_ascii=False)
+
+
+def load(output_dir: str, mmap: bool = True) -> Dict[str, Any]:
+    '''
+        读取列式导出结果，返回 {表名: {列名: 数组}, 'strings': 字符串表}
+    '''
+    output = Path(output_dir)
+    data = {}
+    for table, columns in SCHEMA.items():
+        data[table] = {name: np.load(output / table / f'{name}.npy', mmap_mode='r' if mmap else None) for name, _ in columns}
+    with open(output / 'strings.json', 'r', encoding='utf-8') as f:
+        data['strings'] = json.load(f)
+    return data
+
+
+def find_srk_files(paths: List[str]) -> List[str]:
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(sorted(str(f) for f in Path(p).rglob('*.srk.json')))
+        else:
+            files.append(p)
+    return files
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='将 srk 文件导出为列式 .npy 数据')
+    parser.add_argument('inputs', nargs='+', help='srk 文件或包含 srk 文件的目录')
+    parser.add_argument('-o', '--output', default='columnar', help='输出目录')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    writer = ColumnarWriter()
+    files = find_srk_files(args.inputs)
+    for f in files:
+        try:
+            writer.add_file(f)
+        except Exception as e:
+            print(f'{f} 导出失败: {e}')
+    writer.save(args.output)
+    print(f'共导出 {len(writer.columns["contests"]["contest"])} 场比赛，结果已保存到 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+'''
+srk 增量榜单
+
+实时爬虫每次轮询都会重写完整的 ranking.json，而两次轮询之间通常只有少数几行发生变化。
+RankingDelta 为每次输出的 ranking 编号 _seq，并计算相对上一次 ranking 的 RFC 6902 JSON Patch，
+客户端持有的 ranking 的 _seq 等于增量文件的 base 时应用 patch 即可，否则重新拉取完整 ranking。
+
+rows 按队伍 id（row['user']['id']）比较，而不是按下标比较：某支队伍排名上升时只产生一条 move
+和该队伍、排名变化的队伍各自的字段 replace，而不是把中间的每一行都整行替换。
+
+序号从上一次运行写出的 ranking 文件中继续，重新启动爬虫后的第一份增量仍以客户端持有的 ranking 为基准。
+
+示例：
+    delta = RankingDelta.load('ranking.json')
+    while True:
+        data = calculation.ranking(t)
+        dump_info('ranking.delta.json', delta.update(data))
+        dump_info('ranking.json', data)
+'''
+import json
+from typing import Any, Dict, List, Optional
+
+
+class RankingDelta:
+    """依次接收每次轮询的 ranking，编号并生成相对上一次 ranking 的增量"""
+
+    def __init__(self, snapshot: Optional[Dict[str, Any]] = None):
+        """
+        :param snapshot: 上一次输出的带 _seq 的 ranking，没有时序号从 1 开始，第一份增量没有基准
+        """
+        if snapshot is not None and isinstance(snapshot.get('_seq'), int):
+            self.seq = snapshot['_seq']
+            self.last_data = snapshot
+        else:
+            self.seq = 0
+            self.last_data = None
+
+    @classmethod
+    def load(cls, ranking_path: str) -> 'RankingDelta':
+        """从上一次运行写出的 ranking 文件继续编号，文件不存在或无法解析时从头开始"""
+        try:
+            with open(ranking_path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            return cls()
+
+    def update(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        为 data 写入新的序号 _seq，并返回增量
+        :return: {"seq": 当前序号, "base": 基准序号, "patch": RFC 6902 JSON Patch}，没有基准时 base 为 None，patch 为空
+        """
+        self.seq += 1
+        data['_seq'] = self.seq
+        delta = {'seq': self.seq, 'base': None, 'patch': []}
+        if self.last_data is not None:
+            delta['base'] = self.last_data['_seq']
+            delta['patch'] = diff_ranking(self.last_data, data)
+        self.last_data = data
+        return delta
+
+
+def diff_ranking(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    计算两份 ranking 之间的 RFC 6902 JSON Patch，rows 按队伍 id 比较，其余字段按 json_diff 比较
+    队伍 id 缺失或重复时 rows 也按下标比较
+    """
+    old_rows, new_rows = old.get('rows'), new.get('rows')
+    if not isinstance(old_rows, list) or not isinstance(new_rows, list):
+        return json_diff(old, new)
+    old_ids, new_ids = _row_ids(old_rows), _row_ids(new_rows)
+    if old_ids is None or new_ids is None:
+        return json_diff(old, new)
+
+    ops = json_diff({k: v for k, v in old.items() if k != 'rows'}, {k: v for k, v in new.items() if k != 'rows'})
+    ops.extend(_diff_rows(old_rows, old_ids, new_rows, new_ids))
+    return ops
+
+
+def _row_ids(rows: List[Any]) -> Optional[List[Any]]:
+    """返回每行的队伍 id，缺失或重复时为 None"""
+    ids = []
+    for row in rows:
+        user = row.get('user') if isinstance(row, dict) else None
+        if not isinstance(user, dict) or user.get('id') is None:
+            return None
+        ids.append(user['id'])
+    return ids if len(set(ids)) == len(ids) else None
+
+
+def _diff_rows(old_rows: List[Any], old_ids: List[Any], new_rows: List[Any], new_ids: List[Any]) -> List[Dict[str, Any]]:
+    """
+    先删除消失的队伍，再按新顺序逐个位置用 move 或 add 调整顺序，最后比较每支队伍自身的字段
+    每条操作都在前面的操作应用后的文档上生效，与 RFC 6902 的顺序语义一致
+    """
+    ops = []
+    old_by_id = dict(zip(old_ids, old_rows))
+    new_id_set = set(new_ids)
+    current = list(old_ids)
+    for i in range(len(current) - 1, -1, -1):
+        if current[i] not in new_id_set:
+            ops.append({'op': 'remove', 'path': f'/rows/{i}'})
+            del current[i]
+
+    for j, row_id in enumerate(new_ids):
+        if j < len(current) and current[j] == row_id:
+            continue
+        if row_id in old_by_id:
+            i = current.index(row_id, j)
+            ops.append({'op': 'move', 'from': f'/rows/{i}', 'path': f'/rows/{j}'})
+            del current[i]
+        else:
+            ops.append({'op': 'add', 'path': f'/rows/{j}', 'value': new_rows[j]})
+        current.insert(j, row_id)
+
+    for j, (row_id, row) in enumerate(zip(new_ids, new_rows)):
+        if row_id in old_by_id:
+            ops.extend(json_diff(old_by_id[row_id], row, f'/rows/{j}'))
+    return ops
+
+
+def json_diff(old: Any, new: Any, path: str = '') -> List[Dict[str, Any]]:
+    """
+    计算两个 JSON 值之间的差异，返回 RFC 6902 格式的操作列表（仅使用 add、remove、replace）
+    数组按下标逐项比较，多出的元素追加，缺少的元素从尾部删除
+    """
+    if type(old) != type(new):
+        return [{'op': 'replace', 'path': path, 'value': new}]
+
+    ops = []
+    if isinstance(new, dict):
+        for k in old:
+            if k not in new:
+                ops.append({'op': 'remove', 'path': path + '/' + _escape_pointer(k)})
+        for k, v in new.items():
+            p = path + '/' + _escape_pointer(k)
+            if k not in old:
+                ops.append({'op': 'add', 'path': p, 'value': v})
+            else:
+                ops.extend(json_diff(old[k], v, p))
+    elif isinstance(new, list):
+        n = min(len(old), len(new))
+        for i in range(n):
+            ops.extend(json_diff(old[i], new[i], f'{path}/{i}'))
+        for i in range(n, len(new)):
+            ops.append({'op': 'add', 'path': f'{path}/{i}', 'value': new[i]})
+        for i in range(len(old) - 1, n - 1, -1):
+            ops.append({'op': 'remove', 'path': f'{path}/{i}'})
+    elif old != new:
+        ops.append({'op': 'replace', 'path': path, 'value': new})
+    return ops
+
+
+def _escape_pointer(key: Any) -> str:
+    """按 RFC 6901 转义 JSON Pointer 中的路径片段"""
+    return str(key).replace('~', '~0').replace('/', '~1')
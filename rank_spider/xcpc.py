@@ -3,8 +3,10 @@ import requests
 import rank3
 import re
 import os
+import sys
 from typing import Dict, List, Union
 import image_downloader
+import catalog
 
 
 # contest_name: url
@@ -640,16 +642,29 @@ def main():
     # icpc.pop('2020world-finals')
     # icpc.pop('2020world-finals-Invitational')
     # icpc.pop('48thworld-finals')
+    # 校验失败的比赛不写入文件，全部处理完后统一报告并以非零状态退出
+    failed = []
     for k, v in icpc.items():
-        call_rank(path=v, name=f'icpc/icpc{k}.srk.json')
+        if not call_rank(path=v, name=f'icpc/icpc{k}.srk.json'):
+            failed.append(v)
     for k, v in ccpc.items():
-        call_rank(path=v, name=f'ccpc/ccpc{k}.srk.json')
+        if not call_rank(path=v, name=f'ccpc/ccpc{k}.srk.json'):
+            failed.append(v)
     for k, v in province.items():
-        call_rank(path=v, name=f'province/ccpc{k}.srk.json')
+        if not call_rank(path=v, name=f'province/ccpc{k}.srk.json'):
+            failed.append(v)
     print(unkown_contest)
+    if failed:
+        print(f'{len(failed)} 场比赛校验失败，未写入文件: {failed}', file=sys.stderr)
+        return 1
+    return 0
 
 
-def call_rank(path: str, name: str):
+def call_rank(path: str, name: str) -> bool:
+    '''
+        拉取并转换一场比赛，返回是否没有校验失败（数据缺失而跳过的比赛也返回 True）
+        疑似问题（如时间单位可能写错）输出到标准错误，文件照常写入
+    '''
     print(path, name)
     config = get(f'https://board.xcpcio.com/data{path}/config.json')
     teams = get(f'https://board.xcpcio.com/data{path}/team.json')
@@ -658,13 +673,13 @@ def call_rank(path: str, name: str):
 
     if config is None:
         print(f"{path} 获取 config.json 失败")
-        return
+        return True
     if teams is None:
         print(f"{path} 获取 team.json 失败")
-        return
+        return True
     if runs is None:
         print(f"{path} 获取 run.json 失败")
-        return
+        return True
     # 下载 banner 图片
     banner = config.get('banner', None)
     if banner is not None:
@@ -676,7 +691,7 @@ def call_rank(path: str, name: str):
     runs.sort(key=lambda x: x['timestamp'])
     if len(runs) == 0:
         print(path, name, "获取提交记录为空")
-        return
+        return True
     Parse.time_unit = 'ms'
 
     # for 
@@ -691,23 +706,33 @@ def call_rank(path: str, name: str):
     series = parse.series(marker)
     rows = parse.rows(marker)
     options = parse.options()
-    r = rank3.Rank(contest, 
-                   problems, 
-                   series['rows'], 
-                   rows, 
-                   marker, 
-                   contributors=['XCPCIO (https://xcpcio.com)', 'algoUX (https://algoux.org)'], 
-                   penaltyTimeCalculation = 's' if options else 'min',
-                   isRemarks = series['remarks'],
-                   )
+    try:
+        r = rank3.Rank(contest, 
+                       problems, 
+                       series['rows'], 
+                       rows, 
+                       marker, 
+                       contributors=['XCPCIO (https://xcpcio.com)', 'algoUX (https://algoux.org)'], 
+                       penaltyTimeCalculation = 's' if options else 'min',
+                       isRemarks = series['remarks'],
+                       )
+    except ValueError as e:
+        print(path, name, e, file=sys.stderr)
+        return False
+    for warning in r.warnings:
+        print(f'{path} {name} 警告: {warning}', file=sys.stderr)
+    result = r.result()
+    content = json.dumps(result, ensure_ascii=False).encode('utf-8')
     os.makedirs(os.path.dirname(name), exist_ok=True)
-    with open(name, 'w', encoding='utf-8') as file:
-        json.dump(r.result(), file, ensure_ascii=False)
+    with open(name, 'wb') as file:
+        file.write(content)
+    catalog.update(name, result, content, contest_url.get(config['contest_name']))
+    return True
 
 def once():
     call_rank('/icpc/48th/nanjing', 'temp/nanjing.srk.json')
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
     # once()
\ No newline at end of file